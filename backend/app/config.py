@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+import os
+from dotenv import load_dotenv
+
+@dataclass(frozen=True)
+class Settings:
+    mongo_uri_atlas: Optional[str]
+    mongo_uri_local: str
+    secret_key: Optional[str]
+    argon2_time_cost: int
+    argon2_memory_cost: int
+    argon2_parallelism: int
+    environment: str
+    log_level: str
+    email_host: str
+    email_port: int
+    email_user: str
+    email_pass: str
+    api_base_url: str
+    frontend_base_url: str
+    jwt_secret_key: str
+
+@lru_cache
+def settings() -> Settings:
+    """Read the .env file and environment once per process"""
+    load_dotenv()
+    return Settings(
+        mongo_uri_atlas=os.getenv("MONGO_URI_ATLAS"),
+        mongo_uri_local=os.getenv("MONGO_URI_LOCAL", "mongodb://localhost:27017/leaveapp"),
+        secret_key=os.getenv("SECRET_KEY"),
+        argon2_time_cost=int(os.getenv("ARGON2_TIME_COST", "3")),
+        argon2_memory_cost=int(os.getenv("ARGON2_MEMORY_COST", "65536")),  # KiB
+        argon2_parallelism=int(os.getenv("ARGON2_PARALLELISM", "4")),
+        environment=os.getenv("ENVIRONMENT", "production"),
+        log_level=os.getenv("LOG_LEVEL", "WARNING").upper(),
+        email_host=os.getenv("EMAIL_HOST", "smtp.gmail.com"),
+        email_port=int(os.getenv("EMAIL_PORT", "587")),
+        email_user=os.getenv("EMAIL_USER", "your-email@company.com"),
+        email_pass=os.getenv("EMAIL_PASS", "your-app-password"),
+        api_base_url=os.getenv("API_BASE_URL", "http://localhost:8000"),
+        frontend_base_url=os.getenv("FRONTEND_BASE_URL", "http://localhost:5174"),
+        jwt_secret_key=os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production"),
+    )
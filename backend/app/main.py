@@ -1,32 +1,70 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from starlette.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, ORJSONResponse
 import uvicorn
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+import time
+import logging
+from pymongo.errors import PyMongoError
+from app.config import settings
 
 # Import routes
+from app.models.db import connect_to_mongo, ensure_indexes, close_mongo_connection
 from app.routes import auth
+from app.utils.auth import get_password_hash
+from app.utils.responses import MongoJSONResponse
 # from app.routes import leave  # Temporarily disabled
 
-app = FastAPI(title="Leave Management System", version="1.0.0")
+logging.basicConfig(level=settings().log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Leave Management System", version="1.0.0", default_response_class=MongoJSONResponse)
 
 # Configure CORS
+# The frontend authenticates with bearer tokens, not cookies, so credentials stay off
+ALLOWED_ORIGINS = frozenset({"http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:3000", "http://127.0.0.1:5173"})
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:3000", "http://127.0.0.1:5173"],
-    allow_credentials=True,
+    allow_origins=ALLOWED_ORIGINS,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["*"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 
+# Compress larger JSON bodies; small responses skip the compressor
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 # app.include_router(leave.router, prefix="/leave", tags=["leave"])  # Temporarily disabled
 
+# Centralized 500s for the errors the app expects; HTTPExceptions raised by routes
+# pass through untouched. There is deliberately no bare Exception handler: Starlette
+# runs that one outside CORSMiddleware (so the browser sees an opaque network error)
+# and re-raises, so anything else is left to its default 500, logged once by uvicorn.
+@app.exception_handler(PyMongoError)
+async def database_exception_handler(request: Request, exc: PyMongoError):
+    logger.exception(f"Database error on {request.method} {request.url.path}")
+    return ORJSONResponse(status_code=500, content={"detail": "Database error"})
+
+@app.on_event("startup")
+async def startup_db():
+    await connect_to_mongo()
+    await ensure_indexes()
+
+@app.on_event("shutdown")
+async def shutdown_db():
+    close_mongo_connection()
+
+@app.on_event("startup")
+def benchmark_password_hashing():
+    # Hash a dummy password once so operators can tune the ARGON2_* costs for this host
+    start = time.perf_counter()
+    get_password_hash("startup-benchmark")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    log = logger.warning if elapsed_ms > 250 else logger.info
+    log(f"Password hashing takes {elapsed_ms:.0f}ms per hash on this host (target 50-250ms)")
+
 @app.get("/")
 async def root():
     return {"message": "Leave Management System API", "status": "running"}
@@ -36,9 +74,17 @@ async def health_check():
     return {"status": "healthy", "message": "API is running properly"}
 
 if __name__ == "__main__":
+    import importlib.util
+    # Auto-reload only in development; elsewhere fork one worker per core
+    reload = settings().environment == "development"
+    # uvloop isn't installed on Windows (see requirements.txt); use asyncio's loop there
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
     uvicorn.run(
         "app.main:app", 
         host="0.0.0.0", 
         port=8000, 
-        reload=True
+        reload=reload,
+        loop=loop,
+        http="httptools",
+        workers=None if reload else int(os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1)
     )
@@ -1,13 +1,11 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from pymongo import MongoClient
-from pymongo.collection import Collection
+from pymongo.write_concern import WriteConcern
 from bson import ObjectId
-import os
-from dotenv import load_dotenv
+from app.config import settings
 
-load_dotenv()
-
-MONGO_URI_ATLAS = os.getenv("MONGO_URI_ATLAS")
-MONGO_URI_LOCAL = os.getenv("MONGO_URI_LOCAL", "mongodb://localhost:27017/leaveapp")
+MONGO_URI_ATLAS = settings().mongo_uri_atlas
+MONGO_URI_LOCAL = settings().mongo_uri_local
 # Helper function to extract DB name from URI
 def get_db_name(uri: str, default: str = "leaveapp") -> str:
     try:
@@ -17,13 +15,28 @@ def get_db_name(uri: str, default: str = "leaveapp") -> str:
         pass
     return default
 
+def ping(uri: str, **kwargs) -> None:
+    # One-off blocking probe used only to pick a server at import time
+    probe = MongoClient(uri, **kwargs)
+    try:
+        probe.admin.command("ping")
+    finally:
+        probe.close()
+
+# Keep warm sockets resident so traffic bursts don't pay TLS + auth handshakes
+pool_options = dict(
+    maxPoolSize=100,
+    minPoolSize=10,
+    maxIdleTimeMS=60_000,
+    waitQueueTimeoutMS=5_000,
+)
+
 # Try Atlas connection first
 client = None
 db = None
 try:
     if "mongodb+srv://" in MONGO_URI_ATLAS or "ssl=true" in MONGO_URI_ATLAS.lower():
-        client = MongoClient(
-            MONGO_URI_ATLAS,
+        atlas_options = dict(
             serverSelectionTimeoutMS=30000,
             connectTimeoutMS=20000,
             socketTimeoutMS=20000,
@@ -31,10 +44,11 @@ try:
             w="majority",
         )
     else:
-        client = MongoClient(MONGO_URI_ATLAS)
+        atlas_options = {}
 
     # Test Atlas connection
-    client.admin.command("ping")
+    ping(MONGO_URI_ATLAS, **atlas_options)
+    client = AsyncIOMotorClient(MONGO_URI_ATLAS, **pool_options, **atlas_options)
     print("✅ Connected to MongoDB Atlas")
     db_name = get_db_name(MONGO_URI_ATLAS)
     db = client[db_name]
@@ -44,8 +58,8 @@ except Exception as e:
     print("🔄 Falling back to Local MongoDB...")
 
     try:
-        client = MongoClient(MONGO_URI_LOCAL)
-        client.admin.command("ping")
+        ping(MONGO_URI_LOCAL)
+        client = AsyncIOMotorClient(MONGO_URI_LOCAL, **pool_options)
         print("✅ Connected to Local MongoDB")
         db_name = get_db_name(MONGO_URI_LOCAL)
         db = client[db_name]
@@ -54,5 +68,27 @@ except Exception as e:
         raise RuntimeError("No MongoDB connection available!")
 
 # Collections
-users_collection: Collection = db["users"]
-leaves_collection: Collection = db["leave_requests"]
+users_collection: AsyncIOMotorCollection = db["users"]
+leaves_collection: AsyncIOMotorCollection = db["leave_requests"]
+
+# Handles for best-effort writes that can be redone if lost (hash upgrades, batched
+# log appends): acknowledged by the primary only, without waiting on the journal.
+# Leave decisions keep the client's default write concern.
+_fast_writes = WriteConcern(w=1, j=False)
+users_collection_fast: AsyncIOMotorCollection = users_collection.with_options(write_concern=_fast_writes)
+leaves_collection_fast: AsyncIOMotorCollection = leaves_collection.with_options(write_concern=_fast_writes)
+
+async def connect_to_mongo():
+    # Open the async client's pool before serving traffic
+    await client.admin.command("ping")
+    await users_collection.estimated_document_count()
+
+async def ensure_indexes():
+    # Login and registration look users up by email
+    await users_collection.create_index("email", unique=True)
+    # Query shapes of /leave/pending-approvals and /leave/my-requests
+    await leaves_collection.create_index([("manager_id", 1), ("status", 1), ("is_action_taken", 1)])
+    await leaves_collection.create_index([("employee_id", 1), ("created_at", -1)])
+
+def close_mongo_connection():
+    client.close()
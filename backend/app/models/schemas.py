@@ -1,30 +1,25 @@
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, BeforeValidator, PlainSerializer, WithJsonSchema
 from typing import Optional, Annotated, List
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError('Invalid objectid')
+def to_object_id(v):
+    # Mongo documents already carry ObjectIds; only strings need parsing (once)
+    if isinstance(v, ObjectId):
+        return v
+    try:
         return ObjectId(v)
+    except (InvalidId, TypeError):
+        raise ValueError('Invalid objectid')
 
-    @classmethod
-    def __get_pydantic_json_schema__(cls, field_schema):
-        field_schema.update(type="string")
+# ObjectId accepted as an ObjectId or hex string, serialized to str by pydantic-core
+ObjectIdStr = Annotated[ObjectId, BeforeValidator(to_object_id), PlainSerializer(str, return_type=str), WithJsonSchema({"type": "string"})]
 
 class User(BaseModel):
-    model_config = ConfigDict(
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
-    )
+    model_config = ConfigDict(arbitrary_types_allowed=True)
     
-    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    id: Optional[ObjectIdStr] = Field(default=None, alias="_id")
     email: EmailStr
     hashed_password: str
     full_name: str
@@ -43,14 +38,11 @@ class LeaveRequestCreate(BaseModel):
     manager_email: str
 
 class LeaveRequest(BaseModel):
-    model_config = ConfigDict(
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
-    )
+    model_config = ConfigDict(arbitrary_types_allowed=True)
     
-    id: Optional[PyObjectId] = Field(default=None, alias="_id")
-    employee_id: Optional[PyObjectId] = None
-    manager_id: Optional[PyObjectId] = None
+    id: Optional[ObjectIdStr] = Field(default=None, alias="_id")
+    employee_id: Optional[ObjectIdStr] = None
+    manager_id: Optional[ObjectIdStr] = None
     start_date: str
     end_date: str
     leave_type: str
@@ -58,7 +50,7 @@ class LeaveRequest(BaseModel):
     manager_email: str
     status: str = "pending"
     is_action_taken: bool = False
-    approver_id: Optional[PyObjectId] = None
+    approver_id: Optional[ObjectIdStr] = None
     action_timestamp: Optional[str] = None
     created_at: Optional[str] = None
     # Enhanced approval tracking
@@ -67,12 +59,12 @@ class LeaveRequest(BaseModel):
     requires_hr_approval: bool = False
 
 class LeaveActionRequest(BaseModel):
-    manager_password: str
+    # Not needed when the request carries the manager's bearer token
+    manager_password: Optional[str] = None
     comments: Optional[str] = None
 
 class SecureLeaveActionRequest(BaseModel):
     action_token: str
-    manager_password: str
     action: str  # "approved" or "rejected"
     comments: Optional[str] = None
     ip_address: Optional[str] = None
@@ -1,24 +1,45 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from app.models.db import users_collection
+from app.models.db import users_collection, users_collection_fast
 from app.models.schemas import Token, UserCreate
-from app.utils.auth import verify_password, get_password_hash, create_access_token
+from app.utils.auth import verify_and_update_password_async, get_password_hash_async, create_access_token
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from cachetools import TTLCache
 from datetime import timedelta
-import os
+import threading
 
 router = APIRouter()
 
+# Short-lived cache of user documents by email so repeat logins skip the Mongo round trip
+_user_cache = TTLCache(maxsize=10_000, ttl=30)
+_user_cache_lock = threading.Lock()
+
+# Login only needs these fields; skip decoding the rest of the profile
+LOGIN_PROJECTION = {"_id": 1, "email": 1, "hashed_password": 1, "role": 1}
+
+async def get_user_by_email(email: str):
+    with _user_cache_lock:
+        user = _user_cache.get(email)
+    if user is None:
+        user = await users_collection.find_one({"email": email}, LOGIN_PROJECTION)
+        if user:
+            with _user_cache_lock:
+                _user_cache[email] = user
+    return user
+
+def invalidate_cached_user(email: str):
+    with _user_cache_lock:
+        _user_cache.pop(email, None)
+
 @router.post("/register")
-def register_user(user_data: UserCreate):
-    # Check if user already exists
-    if users_collection.find_one({"email": user_data.email}):
-        raise HTTPException(status_code=400, detail="Email already registered")
+async def register_user(user_data: UserCreate):
+    hashed_password = await get_password_hash_async(user_data.password)
     
     # Create user document
     user_dict = {
         "email": user_data.email,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": hashed_password,
         "full_name": user_data.full_name,
         "role": user_data.role,
         "department": user_data.department,
@@ -28,17 +49,30 @@ def register_user(user_data: UserCreate):
         "is_hr": user_data.role == "hr"
     }
     
-    result = users_collection.insert_one(user_dict)
+    # The unique index on users.email rejects duplicates atomically
+    try:
+        result = await users_collection.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    invalidate_cached_user(user_data.email)
     return {"user_id": str(result.inserted_id), "message": "User registered successfully"}
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     # Find user by email (form_data.username contains the email)
-    user = users_collection.find_one({"email": form_data.username})
+    user = await get_user_by_email(form_data.username)
+    if not user:
+        raise HTTPException(status_code=401, detail="Incorrect email or password")
     
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    ok, new_hash = await verify_and_update_password_async(form_data.password, user["hashed_password"])
+    if not ok:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
+    # Migrate legacy bcrypt (or outdated Argon2) hashes now that we have the plaintext
+    if new_hash:
+        await users_collection_fast.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+        invalidate_cached_user(user["email"])
+    
     access_token = create_access_token(
         data={"sub": str(user["_id"]), "email": user["email"]},
         expires_delta=timedelta(minutes=60*24)
@@ -1,63 +1,81 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response, BackgroundTasks
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
 from ..models.db import get_database
 from ..utils.auth import get_current_user
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/emails", tags=["emails"])
 
+# Mock email notifications data
+# In real implementation, this would fetch from email service or database
+_NOTIFICATIONS = [
+    {
+        "id": 1,
+        "subject": "Leave Request - John Doe (EMP001)",
+        "from_employee": "John Doe",
+        "employee_id": "EMP001",
+        "leave_type": "Annual Leave",
+        "from_date": "2024-01-15",
+        "to_date": "2024-01-17",
+        "reason": "Family vacation",
+        "manager_email": "manager@company.com",
+        "is_read": False,
+        "received_at": "2024-01-10T09:30:00Z",
+        "leave_request_id": "LR001"
+    },
+    {
+        "id": 2,
+        "subject": "Leave Request - Jane Smith (EMP002)",
+        "from_employee": "Jane Smith", 
+        "employee_id": "EMP002",
+        "leave_type": "Sick Leave",
+        "from_date": "2024-01-12",
+        "to_date": "2024-01-12",
+        "reason": "Medical appointment",
+        "manager_email": "manager@company.com",
+        "is_read": True,
+        "received_at": "2024-01-09T14:15:00Z",
+        "leave_request_id": "LR002"
+    }
+]
+
+_ACTIONS = frozenset({"approved", "rejected"})
+
+_TEMPLATES = {
+    "approval_template": {
+        "subject": "Leave Request Approved",
+        "body": "Your leave request has been approved. Details: {details}"
+    },
+    "rejection_template": {
+        "subject": "Leave Request Rejected", 
+        "body": "Your leave request has been rejected. Reason: {reason}"
+    }
+}
+
+# The payloads are static, so encode them once instead of on every request
+_NOTIFICATIONS_JSON = orjson.dumps({"notifications": _NOTIFICATIONS})
+_TEMPLATES_JSON = orjson.dumps(_TEMPLATES)
+
+def _send_email_impl(leave_request_id: str, action: str, comments: Optional[str] = ""):
+    """Deliver the action email; runs after the response has been sent"""
+    # TODO: Integrate with email service (SendGrid, AWS SES, etc.)
+    logger.info(f"Action email sent for leave request {leave_request_id}: {action}")
+
 @router.get("/notifications")
 async def get_email_notifications(
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database)
 ):
     """Get email notifications for HR - leave requests sent via email"""
-    try:
-        # Check if user is HR
-        if current_user.get("role") != "hr":
-            raise HTTPException(status_code=403, detail="Access denied. HR role required.")
-        
-        # Mock email notifications data
-        # In real implementation, this would fetch from email service or database
-        notifications = [
-            {
-                "id": 1,
-                "subject": "Leave Request - John Doe (EMP001)",
-                "from_employee": "John Doe",
-                "employee_id": "EMP001",
-                "leave_type": "Annual Leave",
-                "from_date": "2024-01-15",
-                "to_date": "2024-01-17",
-                "reason": "Family vacation",
-                "manager_email": "manager@company.com",
-                "is_read": False,
-                "received_at": "2024-01-10T09:30:00Z",
-                "leave_request_id": "LR001"
-            },
-            {
-                "id": 2,
-                "subject": "Leave Request - Jane Smith (EMP002)",
-                "from_employee": "Jane Smith", 
-                "employee_id": "EMP002",
-                "leave_type": "Sick Leave",
-                "from_date": "2024-01-12",
-                "to_date": "2024-01-12",
-                "reason": "Medical appointment",
-                "manager_email": "manager@company.com",
-                "is_read": True,
-                "received_at": "2024-01-09T14:15:00Z",
-                "leave_request_id": "LR002"
-            }
-        ]
-        
-        return {"notifications": notifications}
-        
-    except Exception as e:
-        logger.error(f"Error fetching email notifications: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    # Check if user is HR
+    if current_user.get("role") != "hr":
+        raise HTTPException(status_code=403, detail="Access denied. HR role required.")
+    
+    return Response(_NOTIFICATIONS_JSON, media_type="application/json")
 
 @router.put("/{email_id}/read")
 async def mark_email_as_read(
@@ -65,73 +83,47 @@ async def mark_email_as_read(
     current_user: dict = Depends(get_current_user)
 ):
     """Mark an email notification as read"""
-    try:
-        # Check if user is HR
-        if current_user.get("role") != "hr":
-            raise HTTPException(status_code=403, detail="Access denied. HR role required.")
-        
-        # In real implementation, update the email status in database
-        logger.info(f"Email {email_id} marked as read by {current_user['emp_id']}")
-        
-        return {
-            "success": True,
-            "message": "Email marked as read"
-        }
-        
-    except Exception as e:
-        logger.error(f"Error marking email as read: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    # Check if user is HR
+    if current_user.get("role") != "hr":
+        raise HTTPException(status_code=403, detail="Access denied. HR role required.")
+    
+    # In real implementation, update the email status in database
+    logger.info(f"Email {email_id} marked as read by {current_user['emp_id']}")
+    
+    return {
+        "success": True,
+        "message": "Email marked as read"
+    }
 
 @router.post("/send-action")
 async def send_action_email(
     leave_request_id: str,
     action: str,
+    background_tasks: BackgroundTasks,
     comments: Optional[str] = "",
     current_user: dict = Depends(get_current_user)
 ):
     """Send email notification after approving/rejecting leave request"""
-    try:
-        # Check if user is HR
-        if current_user.get("role") != "hr":
-            raise HTTPException(status_code=403, detail="Access denied. HR role required.")
-        
-        # Validate action
-        if action not in ["approved", "rejected"]:
-            raise HTTPException(status_code=400, detail="Invalid action")
-        
-        # In real implementation, send email to employee
-        # TODO: Integrate with email service (SendGrid, AWS SES, etc.)
-        logger.info(f"Action email sent for leave request {leave_request_id}: {action}")
-        
-        return {
-            "success": True,
-            "message": f"Email notification sent - leave request {action}"
-        }
-        
-    except Exception as e:
-        logger.error(f"Error sending action email: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    # Check if user is HR
+    if current_user.get("role") != "hr":
+        raise HTTPException(status_code=403, detail="Access denied. HR role required.")
+    
+    # Validate action
+    if action not in _ACTIONS:
+        raise HTTPException(status_code=400, detail="Invalid action")
+    
+    # Send email to employee without holding the response on the provider round trip
+    background_tasks.add_task(_send_email_impl, leave_request_id, action, comments)
+    
+    return {
+        "success": True,
+        "message": f"Email notification sent - leave request {action}"
+    }
 
 @router.get("/templates")
 async def get_email_templates():
     """Get available email templates"""
-    try:
-        templates = {
-            "approval_template": {
-                "subject": "Leave Request Approved",
-                "body": "Your leave request has been approved. Details: {details}"
-            },
-            "rejection_template": {
-                "subject": "Leave Request Rejected", 
-                "body": "Your leave request has been rejected. Reason: {reason}"
-            }
-        }
-        
-        return templates
-        
-    except Exception as e:
-        logger.error(f"Error fetching email templates: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    return Response(_TEMPLATES_JSON, media_type="application/json")
 
 @router.post("/process-action")
 async def process_email_action(
@@ -139,25 +131,20 @@ async def process_email_action(
     action: str
 ):
     """Process approve/reject action directly from email link"""
-    try:
-        # Validate action
-        if action not in ["approved", "rejected"]:
-            raise HTTPException(status_code=400, detail="Invalid action")
-        
-        # In real implementation:
-        # 1. Decode and validate the token
-        # 2. Extract leave request ID from token
-        # 3. Update leave request status
-        # 4. Send confirmation email
-        
-        logger.info(f"Email action processed: {action}")
-        
-        return {
-            "success": True,
-            "message": f"Leave request {action} via email",
-            "redirect_url": "/hr/dashboard"
-        }
-        
-    except Exception as e:
-        logger.error(f"Error processing email action: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    # Validate action
+    if action not in _ACTIONS:
+        raise HTTPException(status_code=400, detail="Invalid action")
+    
+    # In real implementation:
+    # 1. Decode and validate the token
+    # 2. Extract leave request ID from token
+    # 3. Update leave request status
+    # 4. Queue confirmation email via BackgroundTasks (see send_action_email)
+    
+    logger.info(f"Email action processed: {action}")
+    
+    return {
+        "success": True,
+        "message": f"Leave request {action} via email",
+        "redirect_url": "/hr/dashboard"
+    }
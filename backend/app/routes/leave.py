@@ -1,60 +1,110 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, status, Form
+from fastapi.responses import ORJSONResponse
+from app.config import settings
 from app.models.db import leaves_collection, users_collection
 from app.models.schemas import LeaveRequestCreate, LeaveRequest, LeaveActionRequest, SecureLeaveActionRequest
-from app.utils.auth import verify_token, verify_password, generate_secure_action_token, verify_secure_action_token, create_approval_log
+from app.utils.responses import MongoJSONResponse
+from app.utils.auth import verify_token, optional_verify_token, verify_password_cached, generate_secure_action_token, verify_secure_action_token, create_approval_log
 from bson import ObjectId
+from bson.errors import InvalidId
+from cachetools import LRUCache, TTLCache
 from datetime import datetime, timezone
+from pymongo.errors import PyMongoError
 from typing import Optional, List
 import jwt
-import os
+import logging
+import threading
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # JWT secret for token verification
-JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
+JWT_SECRET_KEY = settings().jwt_secret_key
+
+# Leave types that also need HR sign-off
+_HR_LEAVE_TYPES = frozenset({"medical", "emergency", "extended"})
+_LEAVE_ACTIONS = frozenset({"approved", "rejected"})
+
+# Only the approval-logs endpoint reads the history, and nothing reads the action
+# token back, so leave reads skip both
+LEAVE_LIST_PROJECTION = {"security_token": 0, "approval_logs": 0}
+
+# User fields read when rendering a name or checking a role
+USER_SUMMARY_PROJECTION = {"full_name": 1, "username": 1, "email": 1, "department": 1, "phone": 1}
+USER_ROLE_PROJECTION = {"full_name": 1, "is_manager": 1, "is_hr": 1}
+# Approvers also need their roles and, for password re-auth, the hash
+APPROVER_PROJECTION = {**USER_SUMMARY_PROJECTION, **USER_ROLE_PROJECTION, "hashed_password": 1}
+
+# AMP email clients poll amp/status; keep recent answers for a few seconds, keyed by
+# leave id, and the last known answer to fall back on if MongoDB is unreachable.
+# Entries are dropped as soon as an action is taken on the leave.
+_amp_status_cache = TTLCache(maxsize=10_000, ttl=15)
+_amp_status_last = LRUCache(maxsize=10_000)
+_amp_status_lock = threading.Lock()
+
+def invalidate_amp_status(leave_id: str):
+    with _amp_status_lock:
+        _amp_status_cache.pop(leave_id, None)
+        _amp_status_last.pop(leave_id, None)
+
+def parse_object_id(value: str, name: str = "id") -> ObjectId:
+    """Parse an id from a path or token, answering 400 instead of 500 when it's malformed"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail=f"Invalid {name}")
+
+async def get_users_by_id(*user_ids, projection=USER_SUMMARY_PROJECTION):
+    """Fetch several users in a single round trip, keyed by ObjectId"""
+    ids = list({ObjectId(user_id) for user_id in user_ids if user_id})
+    return {user["_id"]: user async for user in users_collection.find({"_id": {"$in": ids}}, projection)}
 
 @router.post("/submit")
-def submit_leave(leave: LeaveRequestCreate, user_id: str = Depends(verify_token)):
+async def submit_leave(leave: LeaveRequestCreate, user_id: str = Depends(verify_token)):
     # Get user details
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
+    user_oid = ObjectId(user_id)
+    user = await users_collection.find_one({"_id": user_oid}, USER_SUMMARY_PROJECTION)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Find manager by email
-    manager = users_collection.find_one({"email": leave.manager_email})
+    manager = await users_collection.find_one({"email": leave.manager_email}, {"email": 1})
     if not manager:
         raise HTTPException(status_code=404, detail="Manager not found")
     
+    now_iso = datetime.now(timezone.utc).isoformat()
+    requires_hr = leave.leave_type.lower() in _HR_LEAVE_TYPES  # Some leaves may require HR approval
+    
+    # The id is generated client-side so the action token can be stored with the first write
+    leave_oid = ObjectId()
+    
+    # Generate secure action token for the manager
+    try:
+        security_token = generate_secure_action_token(str(leave_oid), str(manager["_id"]))
+    except Exception:
+        logger.exception("Failed to generate security token")
+        security_token = None
+    
     # Create leave request
     leave_dict = leave.model_dump()
     leave_dict.update({
-        "employee_id": ObjectId(user_id),
-        "manager_id": ObjectId(manager["_id"]),
+        "_id": leave_oid,
+        "employee_id": user_oid,
+        "manager_id": manager["_id"],
         "status": "pending",
         "is_action_taken": False,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": now_iso,
         "approval_logs": [],  # Initialize empty approval logs
-        "requires_hr_approval": leave.leave_type.lower() in ["medical", "emergency", "extended"]  # Some leaves may require HR approval
+        "requires_hr_approval": requires_hr
     })
+    if security_token:
+        leave_dict["security_token"] = security_token
     
-    result = leaves_collection.insert_one(leave_dict)
-    leave_id = str(result.inserted_id)
-    
-    # Generate secure action token for the manager
-    try:
-        security_token = generate_secure_action_token(leave_id, str(manager["_id"]))
-        # Update the leave request with the security token
-        leaves_collection.update_one(
-            {"_id": result.inserted_id},
-            {"$set": {"security_token": security_token}}
-        )
-    except Exception as e:
-        print(f"Warning: Failed to generate security token: {str(e)}")
-        security_token = None
+    await leaves_collection.insert_one(leave_dict)
     
     # Prepare comprehensive data for AMP email
     amp_email_data = {
-        "_id": result.inserted_id,
+        "_id": leave_oid,
         "employee_name": user.get("full_name", user.get("username", "Unknown")),
         "employee_id": str(user.get("_id", "")),
         "employee_email": user.get("email", ""),
@@ -63,111 +113,174 @@ def submit_leave(leave: LeaveRequestCreate, user_id: str = Depends(verify_token)
         "manager_id": str(manager["_id"]),
         "manager_email": manager.get("email", ""),
         "leave_type": leave.leave_type,
-        "from_date": leave.from_date,
-        "to_date": leave.to_date,
+        "from_date": leave.start_date,
+        "to_date": leave.end_date,
         "reason": leave.reason,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": now_iso,
         "security_token": security_token,  # Include secure token for AMP email
-        "requires_hr_approval": leave.leave_type.lower() in ["medical", "emergency", "extended"]
+        "requires_hr_approval": requires_hr
     }
     
     # Send interactive AMP email to manager
     try:
-        # email_sent = send_leave_action_email(amp_email_data)  # Temporarily disabled
-        # if not email_sent:
-        #     print("Warning: Failed to send AMP email to manager")
-        print("Email functionality temporarily disabled for testing")
-    except Exception as e:
-        print(f"Email sending error: {str(e)}")
+        # Queued on the mail worker, which logs failures; the request doesn't wait on SMTP
+        # send_leave_action_email(amp_email_data)  # Temporarily disabled
+        logger.debug("Email functionality temporarily disabled for testing")
+    except Exception:
+        logger.exception("Email sending failed")
     
-    return {"leave_request_id": str(result.inserted_id), "status": "pending"}
+    return {"leave_request_id": str(leave_oid), "status": "pending"}
 
 @router.get("/my-requests", response_model=List[dict])
-def get_my_requests(user_id: str = Depends(verify_token)):
-    leaves = list(leaves_collection.find({"employee_id": ObjectId(user_id)}))
-    for leave in leaves:
-        leave["_id"] = str(leave["_id"])
-        leave["employee_id"] = str(leave["employee_id"])
-        leave["manager_id"] = str(leave["manager_id"])
-        if leave.get("approver_id"):
-            leave["approver_id"] = str(leave["approver_id"])
-    return leaves
+async def get_my_requests(user_id: str = Depends(verify_token)):
+    leaves = await leaves_collection.find({"employee_id": ObjectId(user_id)}, LEAVE_LIST_PROJECTION).to_list(length=None)
+    # Returned directly so the ObjectIds are encoded by orjson in one pass
+    return MongoJSONResponse(leaves)
 
 @router.get("/pending-approvals", response_model=List[dict])
-def get_pending_approvals(user_id: str = Depends(verify_token)):
+async def get_pending_approvals(user_id: str = Depends(verify_token)):
     # Check if user is a manager
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
+    user_oid = ObjectId(user_id)
+    user = await users_collection.find_one({"_id": user_oid}, USER_ROLE_PROJECTION)
     if not user or not user.get("is_manager"):
         raise HTTPException(status_code=403, detail="Access denied. Manager role required.")
     
-    leaves = list(leaves_collection.find({
-        "manager_id": ObjectId(user_id), 
+    leaves = await leaves_collection.find({
+        "manager_id": user_oid, 
         "status": "pending",
         "is_action_taken": False
-    }))
+    }, LEAVE_LIST_PROJECTION).to_list(length=None)
     
+    # Attach employee details with one $in query so the dashboard needn't look each one up
+    employees = await get_users_by_id(
+        *{leave["employee_id"] for leave in leaves},
+        projection={"full_name": 1, "email": 1, "department": 1}
+    ) if leaves else {}
     for leave in leaves:
-        leave["_id"] = str(leave["_id"])
-        leave["employee_id"] = str(leave["employee_id"])
-        leave["manager_id"] = str(leave["manager_id"])
-        if leave.get("approver_id"):
-            leave["approver_id"] = str(leave["approver_id"])
-    return leaves
+        employee = employees.get(leave["employee_id"], {})
+        leave["employee_name"] = employee.get("full_name", "Unknown")
+        leave["employee_email"] = employee.get("email", "")
+        leave["employee_department"] = employee.get("department", "Unknown")
+    return MongoJSONResponse(leaves)
 
 @router.post("/{leave_id}/approve")
-def approve_leave(leave_id: str, action_data: LeaveActionRequest):
-    return process_leave_action(leave_id, "approved", action_data.manager_password, action_data.comments)
+async def approve_leave(leave_id: str, action_data: LeaveActionRequest, user_id: Optional[str] = Depends(optional_verify_token)):
+    return await process_leave_action(leave_id, "approved", action_data.manager_password, action_data.comments, user_id)
 
 @router.post("/{leave_id}/reject") 
-def reject_leave(leave_id: str, action_data: LeaveActionRequest):
-    return process_leave_action(leave_id, "rejected", action_data.manager_password, action_data.comments)
+async def reject_leave(leave_id: str, action_data: LeaveActionRequest, user_id: Optional[str] = Depends(optional_verify_token)):
+    return await process_leave_action(leave_id, "rejected", action_data.manager_password, action_data.comments, user_id)
+
+class LeaveAlreadyDecided(Exception):
+    """Raised by _apply_leave_decision when another action got to the leave first"""
+
+    def __init__(self, status: Optional[str]):
+        self.status = status
 
-def process_leave_action(leave_id: str, action: str, password: str, comments: Optional[str] = None):
-    # Find leave request
-    leave = leaves_collection.find_one({"_id": ObjectId(leave_id)})
+async def _apply_leave_decision(
+    leave_oid: ObjectId,
+    manager_oid: Optional[ObjectId],
+    action: str,
+    comments: Optional[str] = None,
+    *,
+    authorize=None,
+    action_method: Optional[str] = None,
+    log_context: Optional[dict] = None,
+):
+    """Shared body of every approve/reject path.
+
+    Loads the leave and the acting manager (the leave's own manager when manager_oid
+    is None), runs the caller's ``authorize(leave, manager)`` check, records the
+    decision with a conditional update and queues the employee notification.
+    When ``log_context`` is given an approval log entry is appended as well.
+    Returns (leave, manager, employee, approval_log).
+    """
+    leave = await leaves_collection.find_one({"_id": leave_oid}, LEAVE_LIST_PROJECTION)
     if not leave:
         raise HTTPException(status_code=404, detail="Leave request not found")
-    
     if leave.get("is_action_taken"):
-        raise HTTPException(status_code=400, detail="Action already taken on this leave request")
+        raise LeaveAlreadyDecided(leave.get("status"))
     
-    # Verify manager password
-    manager = users_collection.find_one({"_id": ObjectId(leave["manager_id"])})
-    if not manager or not verify_password(password, manager["hashed_password"]):
-        raise HTTPException(status_code=401, detail="Invalid manager password")
+    # Load the manager and the employee (for notification) together
+    if manager_oid is None:
+        manager_oid = leave["manager_id"]
+    users = await get_users_by_id(manager_oid, leave["employee_id"], projection=APPROVER_PROJECTION)
+    manager = users.get(manager_oid)
+    employee = users.get(leave["employee_id"])
+    if not manager:
+        raise HTTPException(status_code=404, detail="Manager not found")
     
-    # Get employee details for notification
-    employee = users_collection.find_one({"_id": ObjectId(leave["employee_id"])})
+    if authorize is not None:
+        await authorize(leave, manager)
     
-    # Update leave status
     update_data = {
         "status": action,
         "is_action_taken": True,
-        "approver_id": ObjectId(leave["manager_id"]),
+        "approver_id": manager_oid,
         "action_timestamp": datetime.now(timezone.utc).isoformat()
     }
-    
     if comments:
         update_data["comments"] = comments
+    if action_method:
+        update_data["action_method"] = action_method
+    update = {"$set": update_data}
+    
+    approval_log = None
+    if log_context is not None:
+        approval_log = create_approval_log(
+            action=action,
+            manager_id=str(manager_oid),
+            manager_email=manager["email"],
+            comments=comments or "",
+            **log_context
+        )
+        update["$push"] = {"approval_logs": approval_log}
     
-    leaves_collection.update_one({"_id": ObjectId(leave_id)}, {"$set": update_data})
+    # Only the first of two concurrent actions matches is_action_taken=False
+    updated = await leaves_collection.find_one_and_update(
+        {"_id": leave_oid, "is_action_taken": False},
+        update,
+        projection={"_id": 1}
+    )
+    if updated is None:
+        current = await leaves_collection.find_one({"_id": leave_oid}, {"status": 1})
+        raise LeaveAlreadyDecided(current.get("status") if current else None)
+    invalidate_amp_status(str(leave_oid))
     
-    # Prepare data for employee notification
     if employee:
         notification_data = {
             "employee_name": employee.get("full_name", employee.get("username", "Unknown")),
             "employee_email": employee.get("email", ""),
             "leave_type": leave.get("leave_type", "Leave"),
-            "from_date": leave.get("from_date", ""),
-            "to_date": leave.get("to_date", "")
+            "from_date": leave.get("start_date", ""),
+            "to_date": leave.get("end_date", "")
         }
         
         # Notify employee about the decision
         try:
             # notify_employee(notification_data, action, comments or "")  # Temporarily disabled
-            print(f"Employee notification temporarily disabled for testing - {action}")
-        except Exception as e:
-            print(f"Failed to notify employee: {str(e)}")
+            logger.debug("Employee notification temporarily disabled for testing - %s", action)
+        except Exception:
+            logger.exception("Failed to notify employee")
+    
+    return leave, manager, employee, approval_log
+
+async def process_leave_action(leave_id: str, action: str, password: Optional[str], comments: Optional[str] = None, user_id: Optional[str] = None):
+    async def check_manager(leave, manager):
+        # A signed-in manager is authenticated by their access token; the password is
+        # only checked when the action comes without one
+        if user_id == str(manager["_id"]):
+            return
+        if not password or not await verify_password_cached(password, manager["hashed_password"]):
+            raise HTTPException(status_code=401, detail="Invalid manager password")
+    
+    try:
+        await _apply_leave_decision(
+            parse_object_id(leave_id, "leave id"), None, action, comments,
+            authorize=check_manager
+        )
+    except LeaveAlreadyDecided:
+        raise HTTPException(status_code=400, detail="Action already taken on this leave request")
     
     return {
         "status": action,
@@ -182,7 +295,7 @@ async def amp_approve_leave(
     comments: Optional[str] = Form(None)
 ):
     """Handle AMP email approve action"""
-    return process_amp_action(token, "approved", comments)
+    return await process_amp_action(token, "approved", comments)
 
 @router.post("/amp/reject")
 async def amp_reject_leave(
@@ -190,9 +303,9 @@ async def amp_reject_leave(
     comments: Optional[str] = Form(None)
 ):
     """Handle AMP email reject action"""
-    return process_amp_action(token, "rejected", comments)
+    return await process_amp_action(token, "rejected", comments)
 
-def process_amp_action(token: str, action: str, comments: Optional[str] = None):
+async def process_amp_action(token: str, action: str, comments: Optional[str] = None):
     """Process AMP email actions with secure token verification"""
     try:
         # Verify and decode token
@@ -203,60 +316,21 @@ def process_amp_action(token: str, action: str, comments: Optional[str] = None):
         if not leave_request_id or not manager_id:
             raise HTTPException(status_code=400, detail="Invalid token payload")
         
-        # Find leave request
-        leave = leaves_collection.find_one({"_id": ObjectId(leave_request_id)})
-        if not leave:
-            raise HTTPException(status_code=404, detail="Leave request not found")
-        
-        if leave.get("is_action_taken"):
+        try:
+            _, _, employee, _ = await _apply_leave_decision(
+                parse_object_id(leave_request_id, "token payload"),
+                parse_object_id(manager_id, "token payload"),
+                action,
+                comments.strip() if comments else None,
+                action_method="amp_email"
+            )
+        except LeaveAlreadyDecided as e:
             return {
                 "success": False,
                 "message": "Action already taken on this leave request",
-                "status": leave.get("status")
+                "status": e.status
             }
         
-        # Verify manager
-        manager = users_collection.find_one({"_id": ObjectId(manager_id)})
-        if not manager:
-            raise HTTPException(status_code=404, detail="Manager not found")
-        
-        # Get employee details
-        employee = users_collection.find_one({"_id": ObjectId(leave["employee_id"])})
-        
-        # Update leave status
-        update_data = {
-            "status": action,
-            "is_action_taken": True,
-            "approver_id": ObjectId(manager_id),
-            "action_timestamp": datetime.now(timezone.utc).isoformat(),
-            "action_method": "amp_email"
-        }
-        
-        if comments:
-            update_data["comments"] = comments.strip()
-        
-        leaves_collection.update_one(
-            {"_id": ObjectId(leave_request_id)}, 
-            {"$set": update_data}
-        )
-        
-        # Prepare employee notification data
-        if employee:
-            notification_data = {
-                "employee_name": employee.get("full_name", employee.get("username", "Unknown")),
-                "employee_email": employee.get("email", ""),
-                "leave_type": leave.get("leave_type", "Leave"),
-                "from_date": leave.get("from_date", ""),
-                "to_date": leave.get("to_date", "")
-            }
-            
-            # Send notification to employee
-            try:
-                # notify_employee(notification_data, action, comments or "")  # Temporarily disabled
-                print(f"Employee notification temporarily disabled for testing - {action}")
-            except Exception as e:
-                print(f"Failed to notify employee: {str(e)}")
-        
         return {
             "success": True,
             "message": f"Leave request {action} successfully via AMP email",
@@ -266,6 +340,8 @@ def process_amp_action(token: str, action: str, comments: Optional[str] = None):
             "comments": comments
         }
         
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=400, detail="Token has expired")
     except jwt.InvalidTokenError:
@@ -274,7 +350,7 @@ def process_amp_action(token: str, action: str, comments: Optional[str] = None):
         raise HTTPException(status_code=500, detail=f"Action processing failed: {str(e)}")
 
 @router.get("/amp/status/{token}")
-def get_amp_action_status(token: str):
+async def get_amp_action_status(token: str):
     """Check the status of a leave request from AMP email token"""
     try:
         # Verify and decode token
@@ -284,15 +360,29 @@ def get_amp_action_status(token: str):
         if not leave_request_id:
             raise HTTPException(status_code=400, detail="Invalid token")
         
-        # Find leave request
-        leave = leaves_collection.find_one({"_id": ObjectId(leave_request_id)})
-        if not leave:
-            raise HTTPException(status_code=404, detail="Leave request not found")
+        leave_oid = parse_object_id(leave_request_id, "token")
         
-        # Get employee details
-        employee = users_collection.find_one({"_id": ObjectId(leave["employee_id"])})
+        with _amp_status_lock:
+            cached = _amp_status_cache.get(leave_request_id)
+        if cached is not None:
+            return cached
         
-        return {
+        try:
+            # Find leave request
+            leave = await leaves_collection.find_one({"_id": leave_oid}, LEAVE_LIST_PROJECTION)
+            if not leave:
+                raise HTTPException(status_code=404, detail="Leave request not found")
+            
+            # Get employee details
+            employee = await users_collection.find_one({"_id": leave["employee_id"]}, {"full_name": 1})
+        except PyMongoError:
+            with _amp_status_lock:
+                last = _amp_status_last.get(leave_request_id)
+            if last is None:
+                raise
+            return ORJSONResponse(last, headers={"Stale": "true"})
+        
+        result = {
             "leave_id": str(leave["_id"]),
             "employee_name": employee.get("full_name", "Unknown") if employee else "Unknown",
             "leave_type": leave.get("leave_type", "Leave"),
@@ -303,7 +393,13 @@ def get_amp_action_status(token: str):
             "comments": leave.get("comments", ""),
             "action_timestamp": leave.get("action_timestamp")
         }
+        with _amp_status_lock:
+            _amp_status_cache[leave_request_id] = result
+            _amp_status_last[leave_request_id] = result
+        return result
         
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=400, detail="Token has expired")
     except jwt.InvalidTokenError:
@@ -312,98 +408,48 @@ def get_amp_action_status(token: str):
         raise HTTPException(status_code=500, detail=f"Status check failed: {str(e)}")
 
 @router.post("/secure-approve/{leave_id}")
-def secure_approve_leave(
+async def secure_approve_leave(
     leave_id: str,
     request: Request,
     action_data: SecureLeaveActionRequest
 ):
     """Secure endpoint for approving/rejecting leave requests with enhanced authentication"""
     try:
-        # Verify the leave request exists
-        leave = leaves_collection.find_one({"_id": ObjectId(leave_id)})
-        if not leave:
-            raise HTTPException(status_code=404, detail="Leave request not found")
+        leave_oid = parse_object_id(leave_id, "leave id")
         
         # Verify the secure action token
         token_payload = verify_secure_action_token(action_data.action_token, leave_id)
-        manager_id = token_payload.get("manager_id")
-        
-        # Get manager details
-        manager = users_collection.find_one({"_id": ObjectId(manager_id)})
-        if not manager:
-            raise HTTPException(status_code=404, detail="Manager not found")
-        
-        # Verify manager password
-        if not verify_password(action_data.manager_password, manager["hashed_password"]):
-            raise HTTPException(status_code=401, detail="Invalid manager credentials")
-        
-        # Check if manager has permission to approve this request
-        if not (manager.get("is_manager") or manager.get("is_hr")):
-            raise HTTPException(status_code=403, detail="Insufficient permissions to approve leave")
-        
-        # Additional check: ensure manager is the designated approver
-        if leave.get("manager_email") != manager.get("email") and not manager.get("is_hr"):
-            raise HTTPException(status_code=403, detail="You are not authorized to approve this specific leave request")
-        
-        # Check if already processed
-        if leave.get("is_action_taken", False):
-            raise HTTPException(status_code=400, detail="This leave request has already been processed")
+        manager_oid = parse_object_id(token_payload.get("manager_id"), "action token")
         
         # Validate action
-        if action_data.action not in ["approved", "rejected"]:
+        if action_data.action not in _LEAVE_ACTIONS:
             raise HTTPException(status_code=400, detail="Action must be 'approved' or 'rejected'")
         
-        # Get client information for logging
-        client_ip = request.client.host if request.client else "Unknown"
-        user_agent = request.headers.get("user-agent", "Unknown")
-        
-        # Create detailed approval log
-        approval_log = create_approval_log(
-            action=action_data.action,
-            manager_id=str(manager["_id"]),
-            manager_email=manager["email"],
-            comments=action_data.comments or "",
-            ip_address=client_ip,
-            user_agent=user_agent
-        )
-        
-        # Update leave request with secure approval
-        update_data = {
-            "status": action_data.action,
-            "is_action_taken": True,
-            "approver_id": ObjectId(manager_id),
-            "action_timestamp": datetime.now(timezone.utc).isoformat(),
-            "comments": action_data.comments or "",
-            "$push": {"approval_logs": approval_log}  # Add to approval history
-        }
-        
-        # Update the leave request
-        result = leaves_collection.update_one(
-            {"_id": ObjectId(leave_id)},
-            update_data
-        )
-        
-        if result.modified_count == 0:
-            raise HTTPException(status_code=500, detail="Failed to update leave request")
-        
-        # Get employee details for notification
-        employee = users_collection.find_one({"_id": leave.get("employee_id")})
-        
-        # Prepare notification data (email functionality commented out for testing)
-        notification_data = {
-            "employee_email": employee.get("email", "") if employee else "",
-            "employee_name": employee.get("full_name", "Unknown") if employee else "Unknown",
-            "leave_type": leave.get("leave_type", "Leave"),
-            "from_date": leave.get("start_date", ""),
-            "to_date": leave.get("end_date", "")
+        async def check_approver(leave, manager):
+            # The action token is signed, bound to this leave and manager, and only
+            # issued to that manager after they signed in, so no password re-check is needed
+            # Check if manager has permission to approve this request
+            if not (manager.get("is_manager") or manager.get("is_hr")):
+                raise HTTPException(status_code=403, detail="Insufficient permissions to approve leave")
+            
+            # Additional check: ensure manager is the designated approver
+            if leave.get("manager_email") != manager.get("email") and not manager.get("is_hr"):
+                raise HTTPException(status_code=403, detail="You are not authorized to approve this specific leave request")
+        
+        # Client information for the approval log
+        log_context = {
+            "ip_address": request.client.host if request.client else "Unknown",
+            "user_agent": request.headers.get("user-agent", "Unknown")
         }
         
-        # Send notification to employee (temporarily disabled)
         try:
-            # notify_employee(notification_data, action_data.action, action_data.comments or "")
-            print(f"Secure approval notification temporarily disabled - {action_data.action}")
-        except Exception as e:
-            print(f"Failed to notify employee: {str(e)}")
+            _, manager, _, approval_log = await _apply_leave_decision(
+                leave_oid, manager_oid, action_data.action, action_data.comments,
+                authorize=check_approver,
+                log_context=log_context
+            )
+        except LeaveAlreadyDecided:
+            raise HTTPException(status_code=400, detail="This leave request has already been processed")
         
         return {
             "success": True,
@@ -422,15 +468,18 @@ def secure_approve_leave(
         raise HTTPException(status_code=500, detail=f"Secure approval failed: {str(e)}")
 
 @router.get("/approval-logs/{leave_id}")
-def get_approval_logs(leave_id: str, current_user=Depends(verify_token)):
+async def get_approval_logs(leave_id: str, current_user=Depends(verify_token)):
     """Get detailed approval logs for a leave request"""
     try:
-        leave = leaves_collection.find_one({"_id": ObjectId(leave_id)})
+        leave = await leaves_collection.find_one(
+            {"_id": parse_object_id(leave_id, "leave id")},
+            {"employee_id": 1, "status": 1, "is_action_taken": 1, "approval_logs": 1}
+        )
         if not leave:
             raise HTTPException(status_code=404, detail="Leave request not found")
         
         # Get current user details
-        user = users_collection.find_one({"_id": ObjectId(current_user)})
+        user = await users_collection.find_one({"_id": ObjectId(current_user)}, USER_ROLE_PROJECTION)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -443,10 +492,17 @@ def get_approval_logs(leave_id: str, current_user=Depends(verify_token)):
         
         approval_logs = leave.get("approval_logs", [])
         
+        # Fetch every manager referenced by the logs in one query
+        manager_ids = {ObjectId(log["manager_id"]) for log in approval_logs if log.get("manager_id")}
+        managers = {}
+        if manager_ids:
+            cursor = users_collection.find({"_id": {"$in": list(manager_ids)}}, {"full_name": 1, "department": 1})
+            managers = {str(m["_id"]): m async for m in cursor}
+        
         # Enhance logs with manager names
         enhanced_logs = []
         for log in approval_logs:
-            manager = users_collection.find_one({"_id": ObjectId(log.get("manager_id", ""))})
+            manager = managers.get(log.get("manager_id"))
             enhanced_log = log.copy()
             enhanced_log["manager_name"] = manager.get("full_name", "Unknown") if manager else "Unknown"
             enhanced_log["manager_department"] = manager.get("department", "Unknown") if manager else "Unknown"
@@ -466,16 +522,16 @@ def get_approval_logs(leave_id: str, current_user=Depends(verify_token)):
         raise HTTPException(status_code=500, detail=f"Failed to get approval logs: {str(e)}")
 
 @router.post("/generate-action-token/{leave_id}")
-def generate_action_token_endpoint(leave_id: str, current_user=Depends(verify_token)):
+async def generate_action_token_endpoint(leave_id: str, current_user=Depends(verify_token)):
     """Generate a secure action token for a leave request (for testing/admin purposes)"""
     try:
         # Verify user is manager or HR
-        user = users_collection.find_one({"_id": ObjectId(current_user)})
+        user = await users_collection.find_one({"_id": ObjectId(current_user)}, USER_ROLE_PROJECTION)
         if not user or not (user.get("is_manager") or user.get("is_hr")):
             raise HTTPException(status_code=403, detail="Only managers and HR can generate action tokens")
         
         # Verify leave request exists
-        leave = leaves_collection.find_one({"_id": ObjectId(leave_id)})
+        leave = await leaves_collection.find_one({"_id": parse_object_id(leave_id, "leave id")}, {"_id": 1})
         if not leave:
             raise HTTPException(status_code=404, detail="Leave request not found")
         
@@ -1,6 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.models.db import db, users_collection, leaves_collection
+from app.config import settings
+import logging
+from app.models.db import db, users_collection, leaves_collection, connect_to_mongo, close_mongo_connection
+
+logging.basicConfig(level=settings().log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
 app = FastAPI()
 
@@ -13,6 +17,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup_db():
+    await connect_to_mongo()
+
+@app.on_event("shutdown")
+def shutdown_db():
+    close_mongo_connection()
+
 @app.get("/")
 async def read_root():
     return {"message": "Backend is running"}
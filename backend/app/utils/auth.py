@@ -1,31 +1,106 @@
-from passlib.context import CryptContext
+from argon2 import PasswordHasher, Type
+from argon2.exceptions import InvalidHashError, VerificationError
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-import os
-from dotenv import load_dotenv
+from app.config import settings
+import bcrypt
 import secrets
 import hashlib
+import hmac
+import threading
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from typing import Optional, Dict, Any
 from datetime import timezone
 from app.models.db import users_collection
 from bson import ObjectId
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
+SECRET_KEY = settings().secret_key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
+# Argon2id parameters for new hashes; tune per host so a hash takes roughly 50-250ms.
+# Parameters are embedded in each hash, so existing hashes keep verifying after a change.
+ARGON2_TIME_COST = settings().argon2_time_cost
+ARGON2_MEMORY_COST = settings().argon2_memory_cost
+ARGON2_PARALLELISM = settings().argon2_parallelism
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_argon2 = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+    type=Type.ID,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+
+# Password hashing is pure CPU work; run it off the event loop on a pool sized to the cores
+_HASH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="pwhash")
+
+# Successful password checks for the explicit re-auth flows, so a manager working
+# through a queue of approvals only pays for the hash once every few minutes.
+# Keys are (stored hash, HMAC of the password under a per-process key): a password
+# change invalidates the entry and no plaintext or plain digest is kept in memory.
+_verified_passwords = TTLCache(maxsize=1024, ttl=300)
+_verified_passwords_lock = threading.Lock()
+_PASSWORD_CACHE_KEY = secrets.token_bytes(32)
+
+# bcrypt is only kept to verify legacy hashes, which are re-hashed on next login.
+# Anything that is neither (empty, corrupted, plaintext left by a broken import)
+# fails fast instead of going through a full verify.
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    if not isinstance(hashed_password, str):
+        return False
+    if hashed_password.startswith("$argon2"):
+        try:
+            return _argon2.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        # bcrypt only ever hashed the first 72 bytes
+        try:
+            return bcrypt.checkpw(plain_password.encode()[:72], hashed_password.encode())
+        except ValueError:
+            return False
+    return False
+
+def verify_and_update_password(plain_password, hashed_password):
+    """Verify a password and return (ok, new_hash); new_hash is set when the stored hash is outdated"""
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if hashed_password.startswith("$argon2") and not _argon2.check_needs_rehash(hashed_password):
+        return True, None
+    return True, get_password_hash(plain_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return _argon2.hash(password)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await asyncio.get_running_loop().run_in_executor(_HASH_POOL, verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    return await asyncio.get_running_loop().run_in_executor(_HASH_POOL, verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await asyncio.get_running_loop().run_in_executor(_HASH_POOL, get_password_hash, password)
+
+async def verify_password_cached(plain_password, hashed_password):
+    key = (hashed_password, hmac.new(_PASSWORD_CACHE_KEY, plain_password.encode(), hashlib.sha256).digest())
+    with _verified_passwords_lock:
+        if key in _verified_passwords:
+            return True
+    if not await verify_password_async(plain_password, hashed_password):
+        return False
+    with _verified_passwords_lock:
+        _verified_passwords[key] = True
+    return True
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -34,80 +109,72 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Recently verified access tokens -> (user_id, exp), so a client polling the API
+# doesn't pay for a signature check and JSON parse on every request. Keyed by the
+# token's SHA-256 so the bearer credentials themselves aren't kept around.
+_TOKEN_CACHE: "OrderedDict[bytes, tuple]" = OrderedDict()
+_TOKEN_CACHE_MAXSIZE = 4096
+
+def decode_access_token(token: str) -> Optional[str]:
+    """Return the user id of a valid, unexpired access token, or None"""
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _TOKEN_CACHE.get(key)
+    if cached is not None:
+        if cached[1] > time.time():
+            _TOKEN_CACHE.move_to_end(key)
+            return cached[0]
+        del _TOKEN_CACHE[key]
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        return None
+    user_id = payload.get("sub")
+    exp = payload.get("exp")
+    if user_id is not None and exp is not None:
+        _TOKEN_CACHE[key] = (user_id, exp)
+        if len(_TOKEN_CACHE) > _TOKEN_CACHE_MAXSIZE:
+            _TOKEN_CACHE.popitem(last=False)
+    return user_id
+
+async def verify_token(token: str = Depends(oauth2_scheme)):
+    user_id = decode_access_token(token)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user_id
 
+async def optional_verify_token(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[str]:
+    """Return the user id of a valid bearer token, or None when there isn't one"""
+    if not token:
+        return None
+    return decode_access_token(token)
+
 def generate_secure_action_token(leave_request_id: str, manager_id: str, action_type: str = "leave_approval") -> str:
-    """Generate a cryptographically secure action token for leave approval/rejection"""
-    # Create a unique payload
-    timestamp = datetime.now(timezone.utc).isoformat()
-    random_salt = secrets.token_hex(16)
-    
+    """Generate a signed action token for approving/rejecting one leave request"""
     payload = {
         "leave_request_id": leave_request_id,
         "manager_id": manager_id,
         "action_type": action_type,
-        "timestamp": timestamp,
-        "salt": random_salt,
-        "exp": datetime.utcnow() + timedelta(hours=48)  # Token expires in 48 hours
+        "iat": datetime.now(timezone.utc),
+        "exp": datetime.now(timezone.utc) + timedelta(hours=48)  # Token expires in 48 hours
     }
-    
-    # Create secure token
-    token = jwt.encode(payload, SECRET_KEY + random_salt, algorithm=ALGORITHM)
-    
-    # Additional security: create hash of token + leave_request_id
-    security_hash = hashlib.sha256((token + leave_request_id).encode()).hexdigest()
-    
-    return f"{token}.{security_hash}"
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_secure_action_token(action_token: str, leave_request_id: str) -> Dict[str, Any]:
     """Verify and decode secure action token"""
     try:
-        # Split token and hash
-        if "." not in action_token:
-            raise HTTPException(status_code=400, detail="Invalid action token format")
-        
-        token_part, provided_hash = action_token.rsplit(".", 1)
-        
-        # Verify hash integrity
-        expected_hash = hashlib.sha256((token_part + leave_request_id).encode()).hexdigest()
-        if not secrets.compare_digest(provided_hash, expected_hash):
-            raise HTTPException(status_code=400, detail="Token integrity check failed")
-        
-        # First decode to get salt
-        try:
-            unverified_payload = jwt.get_unverified_claims(token_part)
-            salt = unverified_payload.get("salt")
-            if not salt:
-                raise HTTPException(status_code=400, detail="Invalid token structure")
-        except JWTError:
-            raise HTTPException(status_code=400, detail="Invalid token structure")
-        
-        # Decode with salted secret
-        payload = jwt.decode(token_part, SECRET_KEY + salt, algorithms=[ALGORITHM])
-        
-        # Verify leave request ID matches
-        if payload.get("leave_request_id") != leave_request_id:
-            raise HTTPException(status_code=400, detail="Token does not match leave request")
-        
-        return payload
-        
+        payload = jwt.decode(action_token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=400, detail="Invalid or expired action token")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Token verification failed: {str(e)}")
+    
+    # Verify leave request ID matches
+    if payload.get("leave_request_id") != leave_request_id:
+        raise HTTPException(status_code=400, detail="Token does not match leave request")
+    
+    return payload
 
 def create_approval_log(action: str, manager_id: str, manager_email: str, comments: str = "", 
                        ip_address: str = "", user_agent: str = "") -> Dict[str, Any]:
@@ -1,72 +1,246 @@
-import smtplib
-import ssl
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
-import os
-from datetime import datetime, timedelta
-import jwt
-import json
+import atexit
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.message import EmailMessage
+from datetime import date, datetime
+import orjson
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Tuple, Union
 import logging
-from dotenv import load_dotenv
+import re
+from string import Template
 
-# Load environment variables
-load_dotenv()
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 # Email configuration
-SMTP_SERVER = os.getenv("EMAIL_HOST", "smtp.gmail.com")
-SMTP_PORT = int(os.getenv("EMAIL_PORT", "587"))
-EMAIL_ADDRESS = os.getenv("EMAIL_USER", "your-email@company.com")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASS", "your-app-password")
-API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
-FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://localhost:5174")
+SMTP_SERVER = settings().email_host
+SMTP_PORT = settings().email_port
+EMAIL_ADDRESS = settings().email_user
+EMAIL_PASSWORD = settings().email_pass
+API_BASE_URL = settings().api_base_url
+FRONTEND_BASE_URL = settings().frontend_base_url
+
+# Links that only depend on FRONTEND_BASE_URL
+_DASHBOARD_URL = f"{FRONTEND_BASE_URL}/manager/dashboard"
+_ALL_REQ_URL = f"{FRONTEND_BASE_URL}/manager/pending-approvals"
+_MY_REQUESTS_URL = f"{FRONTEND_BASE_URL}/employee/my-requests"
+_UNSUB_URL = f"{FRONTEND_BASE_URL}/unsubscribe"
+_HELP_URL = f"{FRONTEND_BASE_URL}/help"
+_COMPANY_URL = FRONTEND_BASE_URL
+_PROFILE_PREFIX = f"{FRONTEND_BASE_URL}/employee/profile/"
+
+# Action tokens are decoded with PyJWT in routes/leave.py using the same key
+_JWT_SECRET = settings().jwt_secret_key.encode()
+_JWT_HEADER_B64 = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b'=')
+
+AMP_TEMPLATE_PATH = Path(__file__).parent / "templates" / "leave_action.amp.html"
+
+# {{name}} placeholders, and the {{#is_urgent}}...{{/is_urgent}} badge section.
+# Unknown names are left alone: the AMP markup has its own client-side mustache tags.
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+_URGENT_RE = re.compile(r"\{\{#is_urgent\}\}(.*?)\{\{/is_urgent\}\}", re.DOTALL)
+_SUBMITTED_AT_FORMAT = '%B %d, %Y at %I:%M %p'
+
+@lru_cache(maxsize=1)
+def _ssl_context():
+    """TLS context for SMTP; loading the CA bundle happens once per process"""
+    import ssl
+    return ssl.create_default_context()
+
+class _SMTPClient:
+    """Long-lived, authenticated SMTP connections, one per sending thread.
+
+    smtplib connections aren't thread-safe, so each mail worker keeps its own and
+    the workers send in parallel. A connection is opened on first use, checked
+    with NOOP before each send and re-established (TLS + login) only when the
+    server has dropped it. smtplib and ssl are imported on first use so processes
+    that never send mail skip them.
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self._local = threading.local()
+        # Every open connection, so close() can reach the ones owned by other threads
+        self._open = set()
+        self._open_lock = threading.Lock()
+
+    @property
+    def _conn(self):
+        return getattr(self._local, "conn", None)
+
+    @_conn.setter
+    def _conn(self, conn):
+        self._local.conn = conn
+        if conn is not None:
+            with self._open_lock:
+                self._open.add(conn)
+
+    def _connect(self):
+        import smtplib
+        context = _ssl_context()
+        if self.port == 465:
+            conn = smtplib.SMTP_SSL(self.host, self.port, context=context)
+        else:
+            conn = smtplib.SMTP(self.host, self.port)
+            conn.starttls(context=context)
+        conn.login(self.username, self.password)
+        return conn
+
+    def _alive(self) -> bool:
+        import smtplib
+        try:
+            return self._conn.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _quit(conn):
+        import smtplib
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    def _disconnect(self):
+        conn = self._conn
+        if conn is not None:
+            with self._open_lock:
+                self._open.discard(conn)
+            self._quit(conn)
+            self._conn = None
+
+    def _ensure_connected(self):
+        if self._conn is None or not self._alive():
+            self._disconnect()
+            self._conn = self._connect()
+
+    def _send_one(self, msg: EmailMessage, from_addr: str, to_addrs):
+        import smtplib
+        try:
+            self._conn.send_message(msg, from_addr, to_addrs)
+        except smtplib.SMTPServerDisconnected:
+            # Dropped between the NOOP and the send; retry once on a fresh connection
+            self._disconnect()
+            self._conn = self._connect()
+            self._conn.send_message(msg, from_addr, to_addrs)
+
+    def send(self, msg: EmailMessage, from_addr: str, to_addrs):
+        self._ensure_connected()
+        self._send_one(msg, from_addr, to_addrs)
+
+    def send_many(self, messages: List[Tuple[EmailMessage, str, Any]]) -> List[bool]:
+        """Send (msg, from_addr, to_addrs) tuples back to back in one session.
+
+        A message that fails, whether refused by the server or lost with the
+        connection, is logged and reported False without aborting the rest of
+        the batch; the next message then starts on a fresh connection.
+        """
+        import smtplib
+        results = []
+        for i, (msg, from_addr, to_addrs) in enumerate(messages):
+            try:
+                if i == 0:
+                    self._ensure_connected()
+                elif self._conn is None:
+                    self._conn = self._connect()
+                self._send_one(msg, from_addr, to_addrs)
+                results.append(True)
+            except (smtplib.SMTPException, OSError) as e:
+                logger.error(f"Failed to send email to {to_addrs}: {str(e)}")
+                results.append(False)
+                self._disconnect()
+        return results
+
+    def close(self):
+        """Quit every thread's connection; called at exit once the mail workers are idle"""
+        with self._open_lock:
+            conns, self._open = self._open, set()
+        for conn in conns:
+            self._quit(conn)
+
+_SMTP = _SMTPClient(SMTP_SERVER, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD)
+atexit.register(_SMTP.close)
+
+# Emails are rendered and sent here so request handlers never wait on SMTP.
+# Each worker holds its own SMTP connection (see _SMTPClient), so up to four
+# messages are in flight at once. The public send_* / notify_* functions return
+# a Future resolving to True/False.
+_MAIL_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mail")
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+def _encode_hs256(payload: Dict[str, Any]) -> str:
+    """Compact HS256 JWS, byte-compatible with jwt.decode(..., algorithms=['HS256'])"""
+    try:
+        payload_json = orjson.dumps(payload, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    except TypeError:
+        # Datetimes are passed through (they would become ISO strings, not numeric
+        # exp/iat); let PyJWT convert them
+        import jwt
+        return jwt.encode(payload, _JWT_SECRET, algorithm='HS256')
+    signing_input = _JWT_HEADER_B64 + b'.' + _b64url(payload_json)
+    signature = hmac.new(_JWT_SECRET, signing_input, hashlib.sha256).digest()
+    return (signing_input + b'.' + _b64url(signature)).decode('ascii')
 
 def generate_action_token(leave_request_id: str, manager_id: str, expires_hours: int = 24) -> str:
     """Generate secure action token for email actions"""
-    expiry = datetime.utcnow() + timedelta(hours=expires_hours)
+    now = int(time.time())
     payload = {
         'leave_request_id': leave_request_id,
         'manager_id': manager_id,
-        'exp': expiry,
-        'iat': datetime.utcnow(),
+        'exp': now + expires_hours * 3600,
+        'iat': now,
         'type': 'leave_action'
     }
     
-    secret_key = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
-    return jwt.encode(payload, secret_key, algorithm='HS256')
+    return _encode_hs256(payload)
 
+@lru_cache(maxsize=1)
 def load_amp_template() -> str:
-    """Load the AMP email template"""
-    template_path = Path(__file__).parent / "templates" / "leave_action.amp.html"
+    """Load the AMP email template; read from disk once per process"""
     try:
-        with open(template_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        return AMP_TEMPLATE_PATH.read_text(encoding='utf-8')
     except FileNotFoundError:
-        logger.error(f"AMP template not found at {template_path}")
+        logger.error(f"AMP template not found at {AMP_TEMPLATE_PATH}")
         raise
 
+def reload_templates():
+    """Drop the cached templates so the next email re-reads them (tests, live edits)"""
+    load_amp_template.cache_clear()
+
 def calculate_leave_days(from_date: str, to_date: str) -> int:
     """Calculate total leave days excluding weekends"""
     try:
-        start = datetime.strptime(from_date, '%Y-%m-%d')
-        end = datetime.strptime(to_date, '%Y-%m-%d')
-        
-        total_days = 0
-        current = start
-        while current <= end:
-            # Skip weekends (Saturday=5, Sunday=6)
-            if current.weekday() < 5:  
-                total_days += 1
-            current += timedelta(days=1)
-        
-        return max(total_days, 1)  # At least 1 day
-    except:
+        start = date.fromisoformat(from_date)
+        end = date.fromisoformat(to_date)
+    except (TypeError, ValueError):
         return 1
+    
+    span = (end - start).days + 1
+    if span <= 0:
+        return 1
+    
+    # Every full week contributes five weekdays; walk only the 0-6 leftover days
+    full_weeks, extra = divmod(span, 7)
+    total_days = full_weeks * 5
+    start_weekday = start.weekday()
+    for i in range(extra):
+        # Skip weekends (Saturday=5, Sunday=6)
+        if (start_weekday + i) % 7 < 5:
+            total_days += 1
+    
+    return max(total_days, 1)  # At least 1 day
 
 def render_amp_template(leave_data: Dict[str, Any]) -> str:
     """Render the AMP email template with leave data"""
@@ -86,26 +260,30 @@ def render_amp_template(leave_data: Dict[str, Any]) -> str:
     
     # Determine if urgent (leave starts within 3 days)
     try:
-        from_date = datetime.strptime(leave_data['from_date'], '%Y-%m-%d')
-        days_until_leave = (from_date - datetime.now()).days
+        days_until_leave = (date.fromisoformat(leave_data['from_date']) - date.today()).days
         is_urgent = days_until_leave <= 3
-    except:
+    except (KeyError, TypeError, ValueError):
         is_urgent = False
     
     # Format submitted date
-    try:
-        if 'created_at' in leave_data:
-            submitted_at = datetime.fromisoformat(leave_data['created_at'].replace('Z', '+00:00'))
-        else:
-            submitted_at = datetime.now()
-        formatted_submitted = submitted_at.strftime('%B %d, %Y at %I:%M %p')
-    except:
-        formatted_submitted = datetime.now().strftime('%B %d, %Y at %I:%M %p')
+    submitted_at = leave_data.get('created_at')
+    if isinstance(submitted_at, str):
+        if submitted_at.endswith('Z'):
+            # fromisoformat only accepts a trailing Z from Python 3.11 on
+            submitted_at = submitted_at[:-1] + '+00:00'
+        try:
+            submitted_at = datetime.fromisoformat(submitted_at)
+        except ValueError:
+            submitted_at = None
+    if not isinstance(submitted_at, datetime):
+        submitted_at = datetime.now()
+    formatted_submitted = submitted_at.strftime(_SUBMITTED_AT_FORMAT)
     
     # Prepare template variables
+    employee_id = leave_data.get('employee_id', '')
     template_vars = {
         'employee_name': leave_data.get('employee_name', 'Unknown Employee'),
-        'employee_id': leave_data.get('employee_id', ''),
+        'employee_id': employee_id,
         'employee_email': leave_data.get('employee_email', ''),
         'department': leave_data.get('department', 'Unknown'),
         'phone_number': leave_data.get('phone_number', ''),
@@ -121,70 +299,54 @@ def render_amp_template(leave_data: Dict[str, Any]) -> str:
         'action_token': action_token,
         'manager_id': str(leave_data.get('manager_id', '')),
         'api_base_url': API_BASE_URL,
-        'dashboard_url': f"{FRONTEND_BASE_URL}/manager/dashboard",
-        'all_requests_url': f"{FRONTEND_BASE_URL}/manager/pending-approvals",
-        'employee_profile_url': f"{FRONTEND_BASE_URL}/employee/profile/{leave_data.get('employee_id', '')}",
-        'unsubscribe_url': f"{FRONTEND_BASE_URL}/unsubscribe",
-        'help_url': f"{FRONTEND_BASE_URL}/help",
-        'company_url': f"{FRONTEND_BASE_URL}"
+        'dashboard_url': _DASHBOARD_URL,
+        'all_requests_url': _ALL_REQ_URL,
+        'employee_profile_url': f"{_PROFILE_PREFIX}{employee_id}",
+        'unsubscribe_url': _UNSUB_URL,
+        'help_url': _HELP_URL,
+        'company_url': _COMPANY_URL
     }
     
-    # Simple template variable replacement
-    rendered_template = template
-    for key, value in template_vars.items():
-        placeholder = f"{{{{{key}}}}}"
-        rendered_template = rendered_template.replace(placeholder, str(value))
+    # Keep or drop the urgent badge section, then fill every placeholder in one pass
+    body = _URGENT_RE.sub(lambda m: m.group(1) if is_urgent else "", template)
+    def fill(m):
+        name = m.group(1)
+        if name not in template_vars:
+            return m.group(0)
+        value = template_vars[name]
+        # Most values are already strings; only convert the odd int/None
+        return value if type(value) is str else str(value)
     
-    # Handle conditional sections for urgent badge
-    if is_urgent:
-        rendered_template = rendered_template.replace('{{#is_urgent}}', '').replace('{{/is_urgent}}', '')
-    else:
-        # Remove urgent badge section
-        import re
-        rendered_template = re.sub(r'{{#is_urgent}}.*?{{/is_urgent}}', '', rendered_template, flags=re.DOTALL)
-    
-    return rendered_template
+    return _PLACEHOLDER_RE.sub(fill, body)
 
-def send_leave_action_email(leave_data: Dict[str, Any]) -> bool:
-    """Send interactive AMP email to manager for leave approval"""
-    try:
-        # Render AMP template
-        amp_html = render_amp_template(leave_data)
-        
-        # Create email message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"🚨 Leave Request - {leave_data.get('employee_name', 'Unknown')} ({leave_data.get('employee_id', '')})"
-        msg['From'] = EMAIL_ADDRESS
-        msg['To'] = leave_data.get('manager_email', '')
-        
-        # Add custom headers for better email client support
-        msg['X-Priority'] = '1'  # High priority
-        msg['X-MSMail-Priority'] = 'High'
-        msg['Importance'] = 'high'
-        
-        # Create plain text version
-        text_content = f"""
+# Fallback bodies for clients without AMP support, and the employee notification.
+# Built once at import with the links baked in; each send is a single Template.substitute() pass.
+_AMP_FALLBACK_FIELDS = {
+    'employee_name': 'Unknown', 'employee_id': '', 'employee_email': '', 'department': '',
+    'leave_type': '', 'from_date': '', 'to_date': '', 'reason': '', 'manager_email': '',
+}
+
+_AMP_TEXT_TMPL = Template(f"""
         Leave Request - Action Required
         
-        Employee: {leave_data.get('employee_name', 'Unknown')}
-        Employee ID: {leave_data.get('employee_id', '')}
-        Email: {leave_data.get('employee_email', '')}
-        Department: {leave_data.get('department', '')}
+        Employee: $employee_name
+        Employee ID: $employee_id
+        Email: $employee_email
+        Department: $department
         
         Leave Details:
-        Type: {leave_data.get('leave_type', '')}
-        From: {leave_data.get('from_date', '')}
-        To: {leave_data.get('to_date', '')}
-        Reason: {leave_data.get('reason', '')}
+        Type: $leave_type
+        From: $from_date
+        To: $to_date
+        Reason: $reason
         
         To approve or reject this request, please use the interactive email or visit:
-        {FRONTEND_BASE_URL}/manager/pending-approvals
+        {_ALL_REQ_URL}
         
         This is an automated message from Leave Management System.
-        """
-        
-        # Create HTML fallback version
-        html_content = f"""
+        """)
+
+_AMP_HTML_FALLBACK_TMPL = Template(f"""
         <html>
         <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
             <div style="background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%); color: white; padding: 30px; border-radius: 16px 16px 0 0; text-align: center;">
@@ -193,24 +355,24 @@ def send_leave_action_email(leave_data: Dict[str, Any]) -> bool:
             </div>
             
             <div style="border: 1px solid #e5e7eb; border-top: none; padding: 30px; border-radius: 0 0 16px 16px;">
-                <h2 style="color: #1f2937; margin-top: 0;">Employee: {leave_data.get('employee_name', 'Unknown')}</h2>
+                <h2 style="color: #1f2937; margin-top: 0;">Employee: $employee_name</h2>
                 
                 <div style="background: #f8fafc; padding: 20px; border-radius: 12px; border-left: 4px solid #3b82f6;">
-                    <p><strong>Employee ID:</strong> {leave_data.get('employee_id', '')}</p>
-                    <p><strong>Email:</strong> {leave_data.get('employee_email', '')}</p>
-                    <p><strong>Department:</strong> {leave_data.get('department', '')}</p>
-                    <p><strong>Leave Type:</strong> {leave_data.get('leave_type', '')}</p>
-                    <p><strong>From Date:</strong> {leave_data.get('from_date', '')}</p>
-                    <p><strong>To Date:</strong> {leave_data.get('to_date', '')}</p>
-                    <p><strong>Reason:</strong> {leave_data.get('reason', '')}</p>
+                    <p><strong>Employee ID:</strong> $employee_id</p>
+                    <p><strong>Email:</strong> $employee_email</p>
+                    <p><strong>Department:</strong> $department</p>
+                    <p><strong>Leave Type:</strong> $leave_type</p>
+                    <p><strong>From Date:</strong> $from_date</p>
+                    <p><strong>To Date:</strong> $to_date</p>
+                    <p><strong>Reason:</strong> $reason</p>
                 </div>
                 
                 <div style="text-align: center; margin: 30px 0;">
-                    <a href="{FRONTEND_BASE_URL}/manager/pending-approvals" 
+                    <a href="{_ALL_REQ_URL}" 
                        style="background: #10b981; color: white; padding: 16px 32px; border-radius: 12px; text-decoration: none; font-weight: 600; margin: 0 8px; display: inline-block;">
                         ✅ APPROVE REQUEST
                     </a>
-                    <a href="{FRONTEND_BASE_URL}/manager/pending-approvals" 
+                    <a href="{_ALL_REQ_URL}" 
                        style="background: #ef4444; color: white; padding: 16px 32px; border-radius: 12px; text-decoration: none; font-weight: 600; margin: 0 8px; display: inline-block;">
                         ❌ REJECT REQUEST
                     </a>
@@ -222,54 +384,142 @@ def send_leave_action_email(leave_data: Dict[str, Any]) -> bool:
             </div>
         </body>
         </html>
-        """
-        
-        # Attach parts
-        part1 = MIMEText(text_content, 'plain')
-        part2 = MIMEText(html_content, 'html')
-        part3 = MIMEText(amp_html, 'html')
-        
-        # Set AMP content type
-        part3.set_param('content-type', 'text/x-amp-html')
-        
-        msg.attach(part1)
-        msg.attach(part2)
-        msg.attach(part3)
+        """)
+
+def _notify_html_template(background: str, color: str, icon: str) -> Template:
+    return Template(f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+            <div style="background: {background}; border-radius: 12px; padding: 20px; text-align: center;">
+                <h2 style="color: {color}; margin: 0 0 16px 0;">
+                    {icon} Leave Request $action_title
+                </h2>
+                
+                <p><strong>Leave Type:</strong> $leave_type</p>
+                <p><strong>Duration:</strong> $from_date to $to_date</p>
+                
+                $comments_html
+                
+                <p style="margin-top: 20px;">
+                    <a href="{_MY_REQUESTS_URL}" 
+                       style="background: #3b82f6; color: white; padding: 12px 24px; border-radius: 8px; text-decoration: none; font-weight: 600;">
+                        View My Requests
+                    </a>
+                </p>
+            </div>
+        </body>
+        </html>
+        """)
+
+_NOTIFY_HTML_TMPLS = {
+    'approved': _notify_html_template('#d1fae5', '#065f46', '✅'),
+    'rejected': _notify_html_template('#fee2e2', '#991b1b', '❌'),
+}
+_NOTIFY_COMMENTS_TMPL = Template(
+    '<div style="background: white; border-radius: 8px; padding: 16px; margin: 16px 0; text-align: left;">'
+    '<strong>Manager Comments:</strong><br>$comments</div>'
+)
+
+def send_leave_action_email(leave_data: Dict[str, Any]) -> Future:
+    """Queue the interactive AMP email to the manager for leave approval"""
+    return _MAIL_EXECUTOR.submit(_do_send_leave_action_email, leave_data)
+
+def _build_leave_action_email(leave_data: Dict[str, Any]) -> EmailMessage:
+    """Render the AMP email and its text/HTML fallbacks into one message"""
+    # Render AMP template
+    amp_html = render_amp_template(leave_data)
+    
+    # Pull each field out of leave_data once for the subject and both fallback bodies
+    ctx = {k: leave_data.get(k, default) for k, default in _AMP_FALLBACK_FIELDS.items()}
+    text_content = _AMP_TEXT_TMPL.substitute(ctx)
+    html_content = _AMP_HTML_FALLBACK_TMPL.substitute(ctx)
+    
+    # Create email message
+    msg = EmailMessage()
+    msg['Subject'] = f"🚨 Leave Request - {ctx['employee_name']} ({ctx['employee_id']})"
+    msg['From'] = EMAIL_ADDRESS
+    msg['To'] = ctx['manager_email']
+    
+    # Add custom headers for better email client support
+    msg['X-Priority'] = '1'  # High priority
+    msg['X-MSMail-Priority'] = 'High'
+    msg['Importance'] = 'high'
+    
+    # multipart/alternative: plain text, then AMP, then HTML. AMP-capable clients
+    # pick the AMP part; the rest fall back to the last part they can render.
+    msg.set_content(text_content)
+    msg.add_alternative(amp_html, subtype='x-amp-html')
+    msg.add_alternative(html_content, subtype='html')
+    return msg
+
+def _do_send_leave_action_email(leave_data: Dict[str, Any]) -> bool:
+    """Send interactive AMP email to manager for leave approval"""
+    try:
+        msg = _build_leave_action_email(leave_data)
+        manager_email = leave_data.get('manager_email', '')
         
         # Send email
-        context = ssl.create_default_context()
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls(context=context)
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            text = msg.as_string()
-            server.sendmail(EMAIL_ADDRESS, leave_data.get('manager_email', ''), text)
+        _SMTP.send(msg, EMAIL_ADDRESS, manager_email)
         
-        logger.info(f"AMP leave request email sent to {leave_data.get('manager_email', '')}")
+        logger.info(f"AMP leave request email sent to {manager_email}")
         return True
         
     except Exception as e:
         logger.error(f"Failed to send AMP email: {str(e)}")
         return False
 
-def send_notification_email(to_email: str, subject: str, message: str, is_html: bool = False) -> bool:
+def send_leave_action_emails_bulk(leaves: List[Dict[str, Any]]) -> Future:
+    """Queue AMP approval emails for many leave requests over one SMTP session.
+
+    The Future resolves to one True/False per entry, in order.
+    """
+    return _MAIL_EXECUTOR.submit(_do_send_leave_action_emails_bulk, leaves)
+
+def _do_send_leave_action_emails_bulk(leaves: List[Dict[str, Any]]) -> List[bool]:
+    # Every body carries its own manager's action token, so each entry is its own
+    # MAIL/RCPT/DATA transaction; they all share one connection (and smtplib
+    # pipelines them when the server advertises PIPELINING).
+    results: List[Optional[bool]] = [None] * len(leaves)
+    batch, positions = [], []
+    for i, leave_data in enumerate(leaves):
+        try:
+            batch.append((_build_leave_action_email(leave_data), EMAIL_ADDRESS, leave_data.get('manager_email', '')))
+            positions.append(i)
+        except Exception as e:
+            logger.error(f"Failed to render AMP email: {str(e)}")
+            results[i] = False
+    
+    if batch:
+        try:
+            sent = _SMTP.send_many(batch)
+        except Exception as e:
+            # Couldn't connect/log in at all
+            logger.error(f"Failed to send AMP emails: {str(e)}")
+            sent = [False] * len(batch)
+        for i, ok in zip(positions, sent):
+            results[i] = ok
+    
+    logger.info(f"AMP leave request emails sent: {sum(1 for ok in results if ok)}/{len(leaves)}")
+    return results
+
+def send_notification_email(to_email: Union[str, List[str]], subject: str, message: str, is_html: bool = False) -> Future:
+    """Queue a simple notification email.
+
+    Pass a list of addresses to send one identical message to all of them in a
+    single SMTP transaction (one MAIL FROM, one RCPT TO per address).
+    """
+    return _MAIL_EXECUTOR.submit(_do_send_notification_email, to_email, subject, message, is_html)
+
+def _do_send_notification_email(to_email: Union[str, List[str]], subject: str, message: str, is_html: bool = False) -> bool:
     """Send simple notification email"""
     try:
-        msg = MIMEMultipart()
+        msg = EmailMessage()
         msg['From'] = EMAIL_ADDRESS
-        msg['To'] = to_email
+        msg['To'] = to_email if isinstance(to_email, str) else ', '.join(to_email)
         msg['Subject'] = subject
+        msg.set_content(message, subtype='html' if is_html else 'plain')
         
-        if is_html:
-            msg.attach(MIMEText(message, 'html'))
-        else:
-            msg.attach(MIMEText(message, 'plain'))
-        
-        context = ssl.create_default_context()
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls(context=context)
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            text = msg.as_string()
-            server.sendmail(EMAIL_ADDRESS, to_email, text)
+        _SMTP.send(msg, EMAIL_ADDRESS, to_email)
         
         logger.info(f"Notification email sent to {to_email}")
         return True
@@ -278,36 +528,26 @@ def send_notification_email(to_email: str, subject: str, message: str, is_html:
         logger.error(f"Failed to send notification email: {str(e)}")
         return False
 
-def notify_employee(leave_data: Dict[str, Any], action: str, comments: str = "") -> bool:
+def notify_employee(leave_data: Dict[str, Any], action: str, comments: str = "") -> Future:
+    """Queue the notification to the employee about a leave request action"""
+    return _MAIL_EXECUTOR.submit(_do_notify_employee, leave_data, action, comments)
+
+def _do_notify_employee(leave_data: Dict[str, Any], action: str, comments: str = "") -> bool:
     """Send notification to employee about leave request action"""
     try:
-        subject = f"Leave Request {action.title()} - {leave_data.get('leave_type', 'Leave')}"
+        action_title = action.title()
+        subject = f"Leave Request {action_title} - {leave_data.get('leave_type', 'Leave')}"
         
-        message = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: {'#d1fae5' if action == 'approved' else '#fee2e2'}; border-radius: 12px; padding: 20px; text-align: center;">
-                <h2 style="color: {'#065f46' if action == 'approved' else '#991b1b'}; margin: 0 0 16px 0;">
-                    {'✅' if action == 'approved' else '❌'} Leave Request {action.title()}
-                </h2>
-                
-                <p><strong>Leave Type:</strong> {leave_data.get('leave_type', '')}</p>
-                <p><strong>Duration:</strong> {leave_data.get('from_date', '')} to {leave_data.get('to_date', '')}</p>
-                
-                {f'<div style="background: white; border-radius: 8px; padding: 16px; margin: 16px 0; text-align: left;"><strong>Manager Comments:</strong><br>{comments}</div>' if comments else ''}
-                
-                <p style="margin-top: 20px;">
-                    <a href="{FRONTEND_BASE_URL}/employee/my-requests" 
-                       style="background: #3b82f6; color: white; padding: 12px 24px; border-radius: 8px; text-decoration: none; font-weight: 600;">
-                        View My Requests
-                    </a>
-                </p>
-            </div>
-        </body>
-        </html>
-        """
+        template = _NOTIFY_HTML_TMPLS.get(action, _NOTIFY_HTML_TMPLS['rejected'])
+        message = template.substitute(
+            action_title=action_title,
+            leave_type=leave_data.get('leave_type', ''),
+            from_date=leave_data.get('from_date', ''),
+            to_date=leave_data.get('to_date', ''),
+            comments_html=_NOTIFY_COMMENTS_TMPL.substitute(comments=comments) if comments else '',
+        )
         
-        return send_notification_email(
+        return _do_send_notification_email(
             leave_data.get('employee_email', ''), 
             subject, 
             message, 
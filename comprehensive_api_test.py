@@ -4,19 +4,90 @@ Comprehensive API Testing Suite for AMP4EMAIL Leave Approval System
 Tests all endpoints, security, and AMP email functionality
 """
 
-import requests
+import asyncio
+import httpx
 import json
+import mmap
+import orjson
+import re
+import statistics
 import time
 import jwt
 from datetime import datetime, timedelta
 import sys
 import os
+from collections import Counter
+from types import MappingProxyType
+from urllib.parse import urlencode
 from typing import Dict, Any, List
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"
 API_TIMEOUT = 30
+# Keep-alive pool shared by every test; sockets are reused instead of re-handshaking
+POOL_MAX_CONNECTIONS = 64
+POOL_MAX_KEEPALIVE = 32
+POOL_KEEPALIVE_EXPIRY = 30  # seconds
+CONNECT_RETRIES = 2
+# How long a static GET (/, /health, /docs) is reused when the server sends no Cache-Control max-age
+STATIC_CACHE_TTL = 60  # seconds
+# Latency sampling in the performance test
+PERF_SAMPLES = 45
+PERF_WARMUP = 5
+PERF_CONCURRENCY = 10
 JWT_SECRET = "your-secret-key-change-in-production"  # Should match backend
+_JWT_SECRET_B = JWT_SECRET.encode()
+
+# Static request parts, built once at import
+_FORM_HEADERS = MappingProxyType({"Content-Type": "application/x-www-form-urlencoded"})
+CORS_TEST_ORIGINS = (
+    "https://mail.google.com",
+    "https://outlook.live.com",
+    "https://amp.gmail.dev",
+    "http://localhost:3000"
+)
+# Only Origin varies per preflight
+_CORS_PREFLIGHT_HEADERS = MappingProxyType({
+    "Access-Control-Request-Method": "POST",
+    "Access-Control-Request-Headers": "Content-Type"
+})
+INJECTION_PAYLOADS = (
+    "'; DROP TABLE users; --",
+    "' OR 1=1 --",
+    "admin'; --",
+    "<script>alert('xss')</script>",
+    "{{constructor.constructor('return process')().exit()}}"
+)
+# Pre-encoded login forms for the injection probes
+_INJECTION_BODIES = tuple(
+    urlencode({"username": payload, "password": "test123"}).encode() for payload in INJECTION_PAYLOADS
+)
+
+# AMP template checks, compiled once and fused so the template is scanned once per check.
+# They are bytes patterns: the template is scanned straight out of an mmap, never decoded.
+AMP_REQUIRED_ELEMENTS = (
+    'amp4email',
+    'amp-form',
+    'amp4email-boilerplate',
+    'action-xhr',
+    'custom-validation-reporting'
+)
+TEMPLATE_SECURITY_PATTERNS = (
+    'javascript:',
+    'on[a-z]+=\"',
+    'eval\\(',
+    'innerHTML',
+    'document\\.'
+)
+# Longest first, so 'amp4email-boilerplate' isn't cut short by its 'amp4email' prefix
+_REQUIRED_ELEMENTS_RE = re.compile(
+    b'|'.join(re.escape(element.encode()) for element in sorted(AMP_REQUIRED_ELEMENTS, key=len, reverse=True))
+)
+# One named group per pattern; match.lastgroup tells which one hit
+_SECURITY_PATTERNS_RE = re.compile(
+    '|'.join(f'(?P<p{i}>{pattern})' for i, pattern in enumerate(TEMPLATE_SECURITY_PATTERNS)).encode(),
+    re.IGNORECASE
+)
 
 class Colors:
     """Console colors for output"""
@@ -31,29 +102,59 @@ class Colors:
     UNDERLINE = '\033[4m'
     END = '\033[0m'
 
+# What a single check can legitimately fail with: transport/HTTP errors and bad
+# JSON bodies (json.JSONDecodeError is a ValueError). Anything else is a bug in
+# the suite and should surface, not be reported as a failed check.
+_REQUEST_ERRORS = (httpx.HTTPError, ValueError)
+
+_BAR = f"{Colors.BOLD}{Colors.BLUE}{'=' * 60}{Colors.END}"
+
+def _json(response: httpx.Response):
+    """Decode a JSON body with orjson; raises ValueError (orjson.JSONDecodeError) if it isn't JSON"""
+    return orjson.loads(response.content)
+
+def _result(outcome):
+    """Unwrap an APITester._batch() entry: return the response or raise its error"""
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome
+
 class APITester:
+    """Runs the suite over one async HTTP client.
+
+    Each test awaits all of its requests first (concurrently where they don't
+    depend on each other) and only then prints its section, so sections that
+    run at the same time never interleave their output.
+    """
+
     def __init__(self, base_url: str = API_BASE_URL):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.timeout = API_TIMEOUT
-        self.test_results = {
-            'passed': 0,
-            'failed': 0,
-            'warnings': 0,
-            'security_issues': 0
-        }
+        limits = httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+        )
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=API_TIMEOUT,
+            # retries only covers failed connects, so no request is ever sent twice
+            transport=httpx.AsyncHTTPTransport(limits=limits, retries=CONNECT_RETRIES),
+            headers={"Connection": "keep-alive"}
+        )
+        self.test_results = Counter(passed=0, failed=0, warnings=0, security_issues=0)
         self.auth_token = None
         self.manager_token = None
         self.test_user_id = None
         self.test_manager_id = None
         self.test_leave_id = None
-        
+        self.test_manager_data = {}
+        # path -> (expires_at, response) for the static GETs
+        self._static_cache: Dict[str, Any] = {}
+
     def print_header(self, title: str):
         """Print formatted test section header"""
-        print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
-        print(f"{Colors.BOLD}{Colors.BLUE}{title.center(60)}{Colors.END}")
-        print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
-        
+        sys.stdout.write(f"\n{_BAR}\n{Colors.BOLD}{Colors.BLUE}{title.center(60)}{Colors.END}\n{_BAR}\n")
+
     def print_test(self, test_name: str, status: str, message: str = "", warning: bool = False):
         """Print formatted test result"""
         if status == "PASS":
@@ -65,83 +166,122 @@ class APITester:
         elif status == "WARN":
             color = Colors.YELLOW
             self.test_results['warnings'] += 1
-            warning = True
         else:
             color = Colors.WHITE
-            
+
         icon = "✅" if status == "PASS" else "❌" if status == "FAIL" else "⚠️"
         print(f"{icon} {color}{test_name:<50} [{status}]{Colors.END}")
         if message:
             print(f"   {Colors.CYAN}→ {message}{Colors.END}")
-            
-        if warning:
+
+        # Flags a warning on a PASS/FAIL result; a WARN status was already counted above
+        if warning and status != "WARN":
             self.test_results['warnings'] += 1
-            
+
     def print_security_issue(self, issue: str, severity: str = "HIGH"):
         """Print security issue"""
         color = Colors.RED if severity == "HIGH" else Colors.YELLOW
         print(f"🔒 {color}SECURITY {severity}: {issue}{Colors.END}")
         self.test_results['security_issues'] += 1
 
-    def test_server_connectivity(self):
+    async def _batch(self, *requests) -> List[Any]:
+        """Send independent requests together; one result per request, in order.
+
+        The backend has no batch endpoint, so the "batch" is a concurrent fan-out
+        over the pooled connections. A request that fails yields its exception
+        instead of cancelling the others (unwrap it with _result).
+        """
+        return await asyncio.gather(*requests, return_exceptions=True)
+
+    async def _cached_get(self, path: str) -> httpx.Response:
+        """GET a static endpoint at most once per freshness window.
+
+        Honours Cache-Control (no-store / no-cache / max-age) and revalidates an
+        expired entry with If-None-Match when the server sent an ETag.
+        """
+        now = time.monotonic()
+        entry = self._static_cache.get(path)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        headers = {}
+        if entry and entry[1].headers.get("ETag"):
+            headers["If-None-Match"] = entry[1].headers["ETag"]
+        response = await self.client.get(path, headers=headers)
+        if response.status_code == 304 and entry:
+            response = entry[1]
+
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        if response.status_code == 200 and "no-store" not in cache_control:
+            ttl = STATIC_CACHE_TTL
+            for directive in cache_control.split(","):
+                name, _, value = directive.strip().partition("=")
+                if name == "max-age" and value.isdigit():
+                    ttl = int(value)
+                elif name == "no-cache":
+                    ttl = 0
+            self._static_cache[path] = (now + ttl, response)
+        return response
+
+    async def test_server_connectivity(self):
         """Test basic server connectivity and health"""
+        root, health, docs = await self._batch(
+            self._cached_get("/"),
+            self._cached_get("/health"),
+            self._cached_get("/docs")
+        )
+
         self.print_header("SERVER CONNECTIVITY TESTS")
-        
+
         try:
             # Test root endpoint
-            response = self.session.get(f"{self.base_url}/")
-            if response.status_code == 200:
+            response = _result(root)
+            if response.is_success:
                 self.print_test("Root endpoint connectivity", "PASS", f"Status: {response.status_code}")
             else:
                 self.print_test("Root endpoint connectivity", "FAIL", f"Status: {response.status_code}")
-        except Exception as e:
+        except _REQUEST_ERRORS as e:
             self.print_test("Root endpoint connectivity", "FAIL", str(e))
-            
+
         try:
             # Test health endpoint
-            response = self.session.get(f"{self.base_url}/health")
-            if response.status_code == 200:
-                data = response.json()
+            response = _result(health)
+            if response.is_success:
+                data = _json(response)
                 self.print_test("Health endpoint", "PASS", f"Status: {data.get('status', 'unknown')}")
             else:
                 self.print_test("Health endpoint", "FAIL", f"Status: {response.status_code}")
-        except Exception as e:
+        except _REQUEST_ERRORS as e:
             self.print_test("Health endpoint", "FAIL", str(e))
-            
+
         try:
             # Test API docs
-            response = self.session.get(f"{self.base_url}/docs")
-            if response.status_code == 200:
+            response = _result(docs)
+            if response.is_success:
                 self.print_test("API Documentation", "PASS", "Swagger UI accessible")
             else:
                 self.print_test("API Documentation", "WARN", "Docs not accessible")
-        except Exception as e:
+        except _REQUEST_ERRORS as e:
             self.print_test("API Documentation", "WARN", str(e))
 
-    def test_cors_configuration(self):
+    async def _probe_origin(self, origin: str):
+        return await self.client.options(
+            "/api/leave/submit",
+            headers={**_CORS_PREFLIGHT_HEADERS, "Origin": origin}
+        )
+
+    async def test_cors_configuration(self):
         """Test CORS configuration for AMP email compatibility"""
+        # Test CORS preflight for AMP requests; they are independent, so send them all at once
+        outcomes = await self._batch(*[self._probe_origin(origin) for origin in CORS_TEST_ORIGINS])
+
         self.print_header("CORS CONFIGURATION TESTS")
-        
-        # Test CORS preflight for AMP requests
-        test_origins = [
-            "https://mail.google.com",
-            "https://outlook.live.com", 
-            "https://amp.gmail.dev",
-            "http://localhost:3000"
-        ]
-        
-        for origin in test_origins:
+
+        for origin, outcome in zip(CORS_TEST_ORIGINS, outcomes):
             try:
-                response = self.session.options(
-                    f"{self.base_url}/api/leave/submit",
-                    headers={
-                        "Origin": origin,
-                        "Access-Control-Request-Method": "POST",
-                        "Access-Control-Request-Headers": "Content-Type"
-                    }
-                )
-                
-                if response.status_code in [200, 204]:
+                response = _result(outcome)
+
+                if response.is_success:
                     cors_headers = response.headers.get("Access-Control-Allow-Origin", "")
                     if cors_headers == "*" or origin in cors_headers:
                         self.print_test(f"CORS for {origin}", "PASS", f"Headers: {cors_headers}")
@@ -151,439 +291,502 @@ class APITester:
                             self.print_security_issue("Gmail AMP emails will be blocked by CORS", "HIGH")
                 else:
                     self.print_test(f"CORS for {origin}", "FAIL", f"Status: {response.status_code}")
-                    
-            except Exception as e:
+
+            except _REQUEST_ERRORS as e:
                 self.print_test(f"CORS for {origin}", "FAIL", str(e))
 
-    def test_authentication_endpoints(self):
+    async def _login(self, username: str, password: str):
+        # FastAPI OAuth2 expects form data
+        return await self._post_login(urlencode({"username": username, "password": password}).encode())
+
+    async def _post_login(self, form_body: bytes):
+        return await self.client.post("/api/auth/login", content=form_body, headers=_FORM_HEADERS)
+
+    async def test_authentication_endpoints(self):
         """Test authentication endpoints"""
-        self.print_header("AUTHENTICATION ENDPOINT TESTS")
-        
+        # One timestamp keeps this run's usernames/emails consistent
+        ts = int(time.time())
+
         # Test user registration
         test_user_data = {
-            "username": f"testuser_{int(time.time())}",
-            "email": f"test_{int(time.time())}@example.com",
+            "username": f"testuser_{ts}",
+            "email": f"test_{ts}@example.com",
             "password": "TestPass123!",
             "full_name": "Test User",
             "role": "employee",
             "department": "IT"
         }
-        
+
         test_manager_data = {
-            "username": f"testmanager_{int(time.time())}",
-            "email": f"manager_{int(time.time())}@example.com",
+            "username": f"testmanager_{ts}",
+            "email": f"manager_{ts}@example.com",
             "password": "TestPass123!",
             "full_name": "Test Manager",
             "role": "manager",
             "department": "IT"
         }
-        
+
+        # Employee and manager are independent: register both, then log both in, concurrently
+        user_reg, manager_reg = await self._batch(
+            self.client.post("/api/auth/register", json=test_user_data),
+            self.client.post("/api/auth/register", json=test_manager_data)
+        )
+        user_login, manager_login = await self._batch(
+            self._login(test_user_data["username"], test_user_data["password"]),
+            self._login(test_manager_data["username"], test_manager_data["password"])
+        )
+
+        # Test token validation
+        profile = None
+        if not isinstance(user_login, BaseException) and user_login.is_success:
+            try:
+                self.auth_token = _json(user_login).get("access_token")
+            except ValueError as e:
+                user_login = e  # reported as a login failure below
+            if self.auth_token:
+                try:
+                    profile = await self.client.get(
+                        "/api/auth/profile",
+                        headers={"Authorization": f"Bearer {self.auth_token}"}
+                    )
+                except httpx.HTTPError as e:
+                    profile = e
+
+        self.print_header("AUTHENTICATION ENDPOINT TESTS")
+
         try:
             # Register test user
-            response = self.session.post(
-                f"{self.base_url}/api/auth/register",
-                json=test_user_data
-            )
-            
-            if response.status_code == 200:
+            response = _result(user_reg)
+
+            if response.is_success:
                 self.print_test("User registration", "PASS", "Employee registered successfully")
                 self.test_user_data = test_user_data
             else:
                 self.print_test("User registration", "FAIL", f"Status: {response.status_code}, Response: {response.text}")
-                
-        except Exception as e:
+
+        except _REQUEST_ERRORS as e:
             self.print_test("User registration", "FAIL", str(e))
-            
+
         try:
             # Register test manager
-            response = self.session.post(
-                f"{self.base_url}/api/auth/register",
-                json=test_manager_data
-            )
-            
-            if response.status_code == 200:
+            response = _result(manager_reg)
+
+            if response.is_success:
                 self.print_test("Manager registration", "PASS", "Manager registered successfully")
                 self.test_manager_data = test_manager_data
             else:
                 self.print_test("Manager registration", "FAIL", f"Status: {response.status_code}")
-                
-        except Exception as e:
+
+        except _REQUEST_ERRORS as e:
             self.print_test("Manager registration", "FAIL", str(e))
-            
+
         # Test user login
         try:
-            login_data = {
-                "username": test_user_data["username"],
-                "password": test_user_data["password"]
-            }
-            
-            response = self.session.post(
-                f"{self.base_url}/api/auth/login",
-                data=login_data,  # FastAPI OAuth2 expects form data
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                self.auth_token = token_data.get("access_token")
+            response = _result(user_login)
+
+            if response.is_success:
                 self.print_test("User login", "PASS", "Token received")
-                
+
                 # Test token validation
-                if self.auth_token:
-                    headers = {"Authorization": f"Bearer {self.auth_token}"}
-                    profile_response = self.session.get(f"{self.base_url}/api/auth/profile", headers=headers)
-                    if profile_response.status_code == 200:
-                        profile = profile_response.json()
-                        self.test_user_id = profile.get("user_id")
+                if profile is not None:
+                    profile_response = _result(profile)
+                    if profile_response.is_success:
+                        self.test_user_id = _json(profile_response).get("user_id")
                         self.print_test("Token validation", "PASS", f"User ID: {self.test_user_id}")
                     else:
                         self.print_test("Token validation", "FAIL", f"Status: {profile_response.status_code}")
             else:
                 self.print_test("User login", "FAIL", f"Status: {response.status_code}, Response: {response.text}")
-                
-        except Exception as e:
+
+        except _REQUEST_ERRORS as e:
             self.print_test("User login", "FAIL", str(e))
-            
+
         # Test manager login
         try:
-            login_data = {
-                "username": test_manager_data["username"],
-                "password": test_manager_data["password"]
-            }
-            
-            response = self.session.post(
-                f"{self.base_url}/api/auth/login",
-                data=login_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            
-            if response.status_code == 200:
-                token_data = response.json()
+            response = _result(manager_login)
+
+            if response.is_success:
+                token_data = _json(response)
                 self.manager_token = token_data.get("access_token")
                 self.print_test("Manager login", "PASS", "Manager token received")
             else:
                 self.print_test("Manager login", "FAIL", f"Status: {response.status_code}")
-                
-        except Exception as e:
+
+        except _REQUEST_ERRORS as e:
             self.print_test("Manager login", "FAIL", str(e))
 
-    def test_leave_management_endpoints(self):
+    async def test_leave_management_endpoints(self):
         """Test leave management endpoints"""
-        self.print_header("LEAVE MANAGEMENT ENDPOINT TESTS")
-        
         if not self.auth_token:
+            self.print_header("LEAVE MANAGEMENT ENDPOINT TESTS")
             self.print_test("Leave endpoints", "FAIL", "No auth token available")
             return
-            
+
         headers = {"Authorization": f"Bearer {self.auth_token}"}
-        
+
         # Test leave submission
         leave_data = {
             "start_date": "2024-12-25",
-            "end_date": "2024-12-27", 
+            "end_date": "2024-12-27",
             "leave_type": "Annual Leave",
             "reason": "Holiday vacation with family",
             "manager_email": self.test_manager_data.get("email", "manager@example.com")
         }
-        
+
+        # Submit first so the listings below include the new request
         try:
-            response = self.session.post(
-                f"{self.base_url}/api/leave/submit",
-                json=leave_data,
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
+            submitted = await self.client.post("/api/leave/submit", json=leave_data, headers=headers)
+        except _REQUEST_ERRORS as e:
+            submitted = e
+
+        lookups = [self.client.get("/api/leave/my-requests", headers=headers)]
+        if self.manager_token:
+            manager_headers = {"Authorization": f"Bearer {self.manager_token}"}
+            lookups.append(self.client.get("/api/leave/pending-approvals", headers=manager_headers))
+        my_requests, *pending = await self._batch(*lookups)
+
+        self.print_header("LEAVE MANAGEMENT ENDPOINT TESTS")
+
+        try:
+            response = _result(submitted)
+
+            if response.is_success:
+                result = _json(response)
                 self.test_leave_id = result.get("leave_request_id")
                 self.print_test("Leave submission", "PASS", f"Leave ID: {self.test_leave_id}")
             else:
                 self.print_test("Leave submission", "FAIL", f"Status: {response.status_code}, Response: {response.text}")
-                
-        except Exception as e:
+
+        except _REQUEST_ERRORS as e:
             self.print_test("Leave submission", "FAIL", str(e))
-            
+
         # Test get my requests
         try:
-            response = self.session.get(
-                f"{self.base_url}/api/leave/my-requests",
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                requests_data = response.json()
+            response = _result(my_requests)
+
+            if response.is_success:
+                requests_data = _json(response)
                 self.print_test("Get my requests", "PASS", f"Found {len(requests_data)} requests")
             else:
                 self.print_test("Get my requests", "FAIL", f"Status: {response.status_code}")
-                
-        except Exception as e:
+
+        except _REQUEST_ERRORS as e:
             self.print_test("Get my requests", "FAIL", str(e))
-            
+
         # Test pending approvals (manager only)
-        if self.manager_token:
-            manager_headers = {"Authorization": f"Bearer {self.manager_token}"}
+        if pending:
             try:
-                response = self.session.get(
-                    f"{self.base_url}/api/leave/pending-approvals",
-                    headers=manager_headers
-                )
-                
-                if response.status_code == 200:
-                    approvals = response.json()
+                response = _result(pending[0])
+
+                if response.is_success:
+                    approvals = _json(response)
                     self.print_test("Pending approvals", "PASS", f"Found {len(approvals)} pending approvals")
                 elif response.status_code == 403:
                     self.print_test("Pending approvals access control", "PASS", "Non-manager access denied")
                 else:
                     self.print_test("Pending approvals", "FAIL", f"Status: {response.status_code}")
-                    
-            except Exception as e:
+
+            except _REQUEST_ERRORS as e:
                 self.print_test("Pending approvals", "FAIL", str(e))
 
-    def test_amp_email_endpoints(self):
+    async def test_amp_email_endpoints(self):
         """Test AMP email specific endpoints"""
         self.print_header("AMP EMAIL ENDPOINT TESTS")
-        
+
         if not self.test_leave_id:
             self.print_test("AMP endpoints", "FAIL", "No test leave request available")
             return
-            
+
         # Generate test action token
+        now = datetime.utcnow()
         try:
             test_token = jwt.encode(
                 {
                     'leave_request_id': self.test_leave_id,
                     'manager_id': self.test_manager_id or "test_manager_id",
-                    'exp': datetime.utcnow() + timedelta(hours=24),
-                    'iat': datetime.utcnow(),
+                    'exp': now + timedelta(hours=24),
+                    'iat': now,
                     'type': 'leave_action'
                 },
-                JWT_SECRET,
+                _JWT_SECRET_B,
                 algorithm='HS256'
             )
-            
+
             # Test AMP approve endpoint
             amp_data = {
                 "token": test_token,
                 "comments": "Approved via AMP email test"
             }
-            
-            response = self.session.post(
-                f"{self.base_url}/api/leave/amp/approve",
+
+            response = await self.client.post(
+                "/api/leave/amp/approve",
                 data=amp_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
+                headers=_FORM_HEADERS
             )
-            
-            if response.status_code == 200:
-                result = response.json()
+
+            if response.is_success:
+                result = _json(response)
                 self.print_test("AMP approve endpoint", "PASS", f"Action: {result.get('action', 'unknown')}")
             else:
                 self.print_test("AMP approve endpoint", "FAIL", f"Status: {response.status_code}, Response: {response.text}")
-                
-        except Exception as e:
+
+        except _REQUEST_ERRORS as e:
             self.print_test("AMP approve endpoint", "FAIL", str(e))
-            
-        # Test token status endpoint
+
+        # Test token status endpoint (after the approval, so it reflects it)
         try:
-            response = self.session.get(f"{self.base_url}/api/leave/amp/status/{test_token}")
-            
-            if response.status_code == 200:
-                status_data = response.json()
+            response = await self.client.get(f"/api/leave/amp/status/{test_token}")
+
+            if response.is_success:
+                status_data = _json(response)
                 self.print_test("AMP status endpoint", "PASS", f"Status: {status_data.get('status', 'unknown')}")
             else:
                 self.print_test("AMP status endpoint", "FAIL", f"Status: {response.status_code}")
-                
-        except Exception as e:
+
+        except _REQUEST_ERRORS as e:
             self.print_test("AMP status endpoint", "FAIL", str(e))
 
-    def test_security_vulnerabilities(self):
+    async def test_security_vulnerabilities(self):
         """Test for common security vulnerabilities"""
-        self.print_header("SECURITY VULNERABILITY TESTS")
-        
         # Test SQL injection attempts
-        injection_payloads = [
-            "'; DROP TABLE users; --",
-            "' OR 1=1 --",
-            "admin'; --",
-            "<script>alert('xss')</script>",
-            "{{constructor.constructor('return process')().exit()}}"
-        ]
-        
-        for payload in injection_payloads:
+        probes = [self._post_login(body) for body in _INJECTION_BODIES]
+        if self.auth_token:
+            # Test with tampered token
+            tampered_token = self.auth_token[:-10] + "tampered123"
+            probes.append(self.client.get(
+                "/api/leave/my-requests",
+                headers={"Authorization": f"Bearer {tampered_token}"}
+            ))
+
+        # Every probe is independent; fire them together
+        outcomes = await self._batch(*probes)
+
+        self.print_header("SECURITY VULNERABILITY TESTS")
+
+        for payload, outcome in zip(INJECTION_PAYLOADS, outcomes):
             try:
-                malicious_data = {
-                    "username": payload,
-                    "password": "test123"
-                }
-                
-                response = self.session.post(
-                    f"{self.base_url}/api/auth/login",
-                    data=malicious_data,
-                    headers={"Content-Type": "application/x-www-form-urlencoded"}
-                )
-                
+                response = _result(outcome)
+
                 # Should not return 500 or crash
                 if response.status_code == 500:
                     self.print_security_issue(f"Potential injection vulnerability with payload: {payload[:20]}...", "HIGH")
-                elif response.status_code == 200:
+                elif response.is_success:
                     self.print_security_issue(f"Authentication bypass possible with payload: {payload[:20]}...", "CRITICAL")
-                    
-            except Exception as e:
+
+            except _REQUEST_ERRORS as e:
                 if "500" in str(e):
                     self.print_security_issue(f"Server error on malicious input: {payload[:20]}...", "MEDIUM")
-                    
+
         # Test JWT token manipulation
         if self.auth_token:
             try:
-                # Test with tampered token
-                tampered_token = self.auth_token[:-10] + "tampered123"
-                headers = {"Authorization": f"Bearer {tampered_token}"}
-                
-                response = self.session.get(f"{self.base_url}/api/leave/my-requests", headers=headers)
-                
-                if response.status_code == 200:
+                response = _result(outcomes[-1])
+
+                if response.is_success:
                     self.print_security_issue("JWT token validation bypass", "CRITICAL")
                 elif response.status_code in [401, 403]:
                     self.print_test("JWT token tampering protection", "PASS", "Tampered token rejected")
-                    
-            except Exception as e:
+
+            except _REQUEST_ERRORS as e:
                 self.print_test("JWT token security test", "WARN", str(e))
-                
+
         # Test rate limiting
         self.print_test("Rate limiting", "WARN", "Manual testing required - not implemented in automated tests")
-        
+
         # Test HTTPS redirect
         self.print_test("HTTPS enforcement", "WARN", "Production should enforce HTTPS")
 
-    def test_email_template_validation(self):
+    async def test_email_template_validation(self):
         """Validate AMP email template compliance"""
         self.print_header("AMP EMAIL TEMPLATE VALIDATION")
-        
+
         template_path = os.path.join(os.path.dirname(__file__), "backend", "app", "utils", "templates", "leave_action.amp.html")
-        
+
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template_content = f.read()
-                
-            # Check for required AMP4EMAIL elements
-            required_elements = [
-                'amp4email',
-                'amp-form',
-                'amp4email-boilerplate',
-                'action-xhr',
-                'custom-validation-reporting'
-            ]
-            
-            for element in required_elements:
-                if element in template_content:
-                    self.print_test(f"AMP element: {element}", "PASS", "Found in template")
-                else:
-                    self.print_test(f"AMP element: {element}", "FAIL", "Missing from template")
-                    
-            # Check for security issues in template
-            security_patterns = [
-                'javascript:',
-                'on[a-z]+=\"',
-                'eval\\(',
-                'innerHTML',
-                'document\\.'
-            ]
-            
-            import re
-            for pattern in security_patterns:
-                if re.search(pattern, template_content, re.IGNORECASE):
-                    self.print_security_issue(f"Potentially unsafe pattern in template: {pattern}", "MEDIUM")
-                    
-            # Check template size
-            template_size = len(template_content.encode('utf-8'))
-            if template_size > 200 * 1024:  # 200KB limit for AMP emails
-                self.print_test("Template size", "FAIL", f"Template too large: {template_size} bytes")
-            else:
-                self.print_test("Template size", "PASS", f"Size: {template_size} bytes")
-                
+            with open(template_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as template_content:
+                self._validate_template(template_content)
+
         except FileNotFoundError:
             self.print_test("AMP template file", "FAIL", f"Template not found: {template_path}")
-        except Exception as e:
+        except (OSError, ValueError) as e:
             self.print_test("AMP template validation", "FAIL", str(e))
 
-    def test_performance_and_load(self):
+    def _validate_template(self, template_content: mmap.mmap):
+        """Run the AMP checks over the mapped template bytes"""
+        # Check for required AMP4EMAIL elements
+        found = set()
+        for match in _REQUIRED_ELEMENTS_RE.finditer(template_content):
+            # A longer hit also contains any shorter element it starts with
+            hit = match.group().decode()
+            found.update(element for element in AMP_REQUIRED_ELEMENTS if element in hit)
+            if len(found) == len(AMP_REQUIRED_ELEMENTS):
+                break
+
+        for element in AMP_REQUIRED_ELEMENTS:
+            if element in found:
+                self.print_test(f"AMP element: {element}", "PASS", "Found in template")
+            else:
+                self.print_test(f"AMP element: {element}", "FAIL", "Missing from template")
+
+        # Check for security issues in template
+        unsafe = {int(match.lastgroup[1:]) for match in _SECURITY_PATTERNS_RE.finditer(template_content)}
+        for i, pattern in enumerate(TEMPLATE_SECURITY_PATTERNS):
+            if i in unsafe:
+                self.print_security_issue(f"Potentially unsafe pattern in template: {pattern}", "MEDIUM")
+
+        # Check template size
+        template_size = template_content.size()
+        if template_size > 200 * 1024:  # 200KB limit for AMP emails
+            self.print_test("Template size", "FAIL", f"Template too large: {template_size} bytes")
+        else:
+            self.print_test("Template size", "PASS", f"Size: {template_size} bytes")
+
+    async def test_performance_and_load(self):
         """Test basic performance and load handling"""
         self.print_header("PERFORMANCE & LOAD TESTS")
-        
+
         # Test response times
         endpoints_to_test = [
             ("/", "GET"),
             ("/health", "GET"),
             ("/api/auth/register", "POST")
         ]
-        
+
+        # Endpoints are measured one after another; within one endpoint PERF_SAMPLES
+        # requests run PERF_CONCURRENCY at a time after PERF_WARMUP untimed requests
         for endpoint, method in endpoints_to_test:
-            start_time = time.time()
             try:
-                if method == "GET":
-                    response = self.session.get(f"{self.base_url}{endpoint}")
-                else:
-                    response = self.session.post(f"{self.base_url}{endpoint}", json={})
-                    
-                response_time = (time.time() - start_time) * 1000  # ms
-                
-                if response_time < 1000:  # Under 1 second
-                    self.print_test(f"Response time {endpoint}", "PASS", f"{response_time:.2f}ms")
-                elif response_time < 3000:  # Under 3 seconds
-                    self.print_test(f"Response time {endpoint}", "WARN", f"{response_time:.2f}ms (slow)")
+                times, errors = await self._sample_latency(endpoint, method)
+                if not times:
+                    raise errors[0]
+
+                cuts = statistics.quantiles(times, n=100)
+                p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+                summary = f"p50 {p50:.2f}ms, p95 {p95:.2f}ms, p99 {p99:.2f}ms (n={len(times)})"
+                if errors:
+                    summary += f", {len(errors)} errors"
+
+                if p95 < 1000:  # Under 1 second
+                    self.print_test(f"Response time {endpoint}", "PASS", summary)
+                elif p95 < 3000:  # Under 3 seconds
+                    self.print_test(f"Response time {endpoint}", "WARN", f"{summary} (slow)")
                 else:
-                    self.print_test(f"Response time {endpoint}", "FAIL", f"{response_time:.2f}ms (too slow)")
-                    
-            except Exception as e:
+                    self.print_test(f"Response time {endpoint}", "FAIL", f"{summary} (too slow)")
+
+            except _REQUEST_ERRORS as e:
                 self.print_test(f"Response time {endpoint}", "FAIL", str(e))
-                
-        # Simple concurrent request test
-        self.print_test("Concurrent requests", "WARN", "Basic load testing - implement stress tests for production")
+
+        # Static GETs again through the client-side cache, against the cold first
+        # hit recorded by the connectivity test
+        for endpoint, method in endpoints_to_test:
+            if method != "GET":
+                continue
+            try:
+                entry = self._static_cache.get(endpoint)
+                fresh = bool(entry) and entry[0] > time.monotonic()
+                start = time.perf_counter()
+                response = await self._cached_get(endpoint)
+                cached_ms = (time.perf_counter() - start) * 1000
+
+                if entry and response is entry[1]:
+                    outcome = "served from cache" if fresh else "revalidated (304)"
+                else:
+                    outcome = "refetched"
+                headers = response.headers
+                summary = (
+                    f"{outcome} in {cached_ms:.2f}ms"
+                    f", Cache-Control: {headers.get('Cache-Control', 'none')}"
+                    f", ETag: {'yes' if headers.get('ETag') else 'none'}"
+                )
+                if entry:
+                    summary = f"first hit {entry[1].elapsed.total_seconds() * 1000:.2f}ms, {summary}"
+
+                if outcome == "refetched":
+                    self.print_test(f"Cached GET {endpoint}", "WARN", f"{summary} (not cacheable)")
+                else:
+                    self.print_test(f"Cached GET {endpoint}", "PASS", summary)
+
+            except _REQUEST_ERRORS as e:
+                self.print_test(f"Cached GET {endpoint}", "FAIL", str(e))
+
+    async def _sample_latency(self, endpoint: str, method: str):
+        """Time PERF_SAMPLES requests to one endpoint; returns (times in ms, errors)"""
+        async def send():
+            if method == "GET":
+                return await self.client.get(endpoint)
+            return await self.client.post(endpoint, json={})
+
+        for _ in range(PERF_WARMUP):
+            try:
+                await send()
+            except httpx.HTTPError:
+                pass
+
+        limit = asyncio.Semaphore(PERF_CONCURRENCY)
+
+        async def timed():
+            async with limit:
+                start = time.perf_counter()
+                await send()
+                return (time.perf_counter() - start) * 1000  # ms
+
+        outcomes = await self._batch(*[timed() for _ in range(PERF_SAMPLES)])
+        times = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        return times, errors
 
     def generate_report(self):
         """Generate comprehensive test report"""
         self.print_header("TEST RESULTS SUMMARY")
-        
+
         total_tests = self.test_results['passed'] + self.test_results['failed'] + self.test_results['warnings']
-        
+
         print(f"{Colors.GREEN}✅ PASSED: {self.test_results['passed']}{Colors.END}")
         print(f"{Colors.RED}❌ FAILED: {self.test_results['failed']}{Colors.END}")
         print(f"{Colors.YELLOW}⚠️  WARNINGS: {self.test_results['warnings']}{Colors.END}")
         print(f"{Colors.PURPLE}🔒 SECURITY ISSUES: {self.test_results['security_issues']}{Colors.END}")
         print(f"{Colors.BLUE}📊 TOTAL TESTS: {total_tests}{Colors.END}")
-        
+
         if self.test_results['failed'] > 0:
             print(f"\n{Colors.RED}{Colors.BOLD}❌ CRITICAL ISSUES FOUND - FIX BEFORE PRODUCTION{Colors.END}")
-            
+
         if self.test_results['security_issues'] > 0:
             print(f"\n{Colors.PURPLE}{Colors.BOLD}🔒 SECURITY VULNERABILITIES DETECTED{Colors.END}")
-            
-        success_rate = (self.test_results['passed'] / total_tests * 100) if total_tests > 0 else 0
+
+        # Warnings are advisories, not outcomes: rate only what actually passed or failed
+        decided = self.test_results['passed'] + self.test_results['failed']
+        success_rate = (self.test_results['passed'] / decided * 100) if decided > 0 else 0
         print(f"\n{Colors.BOLD}SUCCESS RATE: {success_rate:.1f}%{Colors.END}")
-        
+
         return self.test_results
 
-    def run_all_tests(self):
+    async def run_all_tests(self):
         """Run the complete test suite"""
         print(f"{Colors.BOLD}{Colors.BLUE}AMP4EMAIL Leave Approval System - API Test Suite{Colors.END}")
         print(f"{Colors.BLUE}Testing API at: {self.base_url}{Colors.END}")
         print(f"{Colors.BLUE}Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{Colors.END}")
-        
+
         try:
-            self.test_server_connectivity()
-            self.test_cors_configuration()
-            self.test_authentication_endpoints()
-            self.test_leave_management_endpoints()
-            self.test_amp_email_endpoints()
-            self.test_security_vulnerabilities()
-            self.test_email_template_validation()
-            self.test_performance_and_load()
-            
-        except KeyboardInterrupt:
+            # These don't touch shared state, so they run side by side
+            await asyncio.gather(
+                self.test_server_connectivity(),
+                self.test_cors_configuration(),
+                self.test_email_template_validation()
+            )
+            # auth -> leave -> amp -> security share the tokens and leave id
+            await self.test_authentication_endpoints()
+            await self.test_leave_management_endpoints()
+            await self.test_amp_email_endpoints()
+            await self.test_security_vulnerabilities()
+            await self.test_performance_and_load()
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
             print(f"\n{Colors.YELLOW}Tests interrupted by user{Colors.END}")
         except Exception as e:
             print(f"\n{Colors.RED}Test suite error: {str(e)}{Colors.END}")
-            
+
         finally:
+            await self.client.aclose()
             results = self.generate_report()
             return results
 
@@ -593,12 +796,12 @@ def main():
         api_url = sys.argv[1]
     else:
         api_url = API_BASE_URL
-        
+
     print(f"Starting API tests for: {api_url}")
-    
+
     tester = APITester(api_url)
-    results = tester.run_all_tests()
-    
+    results = asyncio.run(tester.run_all_tests())
+
     # Exit with appropriate code
     if results['failed'] > 0 or results['security_issues'] > 0:
         sys.exit(1)